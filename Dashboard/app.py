@@ -4,6 +4,22 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeled.csv')
+FORECAST_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_forecast_final.csv')
+FIGURE_DIR = os.path.join(BASE_DIR, 'data', 'figures')
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+import coverage
+import exports
+import figures
+import kpis
+import simulator
+import snapshots
+import timeseries
+
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
     page_title="Ethiopia Financial Inclusion Dashboard",
@@ -12,8 +28,9 @@ st.set_page_config(
 )
 
 # --- DATA LOADING ---
-@st.cache_data
-def load_data():
+@st.cache_data(max_entries=2)
+def load_data(version):
+    """Cached per data version, so artifacts swapped in by the pipeline show up on the next rerun."""
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_path = os.path.join(base_dir, 'data', 'processed', 'ethiopia_fi_modeled.csv')
     forecast_path = os.path.join(base_dir, 'data', 'processed', 'ethiopia_fi_forecast_final.csv')
@@ -30,16 +47,13 @@ def load_data():
     return df_hist, df_forecast
 
 
-df_hist, df_forecast = load_data()
+df_hist, df_forecast = load_data(exports.data_version(DATA_PATH, FORECAST_PATH))
 
 # Robustness check
 if df_hist is None:
     st.error("❌ Data files missing. Please run the pipeline first.")
     st.stop()
 
-# Filter Data
-access_data = df_hist[df_hist['indicator_code'] == 'ACC_OWNERSHIP']
-
 # --- STYLE & CSS ---
 st.markdown("""
 <style>
@@ -56,29 +70,177 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# --- DATA LOADING ---
-@st.cache_data
-def load_data():
-    # Load Historical & Modeled Data
-    df_hist = pd.read_csv('data/processed/ethiopia_fi_modeled.csv')
-    df_hist['observation_date'] = pd.to_datetime(df_hist['observation_date'])
-    df_hist['year'] = df_hist['observation_date'].dt.year
+# --- VINTAGES ---
+LATEST = "Latest"
 
-    # Load Forecast Data (Task 4 Output)
-    df_forecast = pd.read_csv('data/processed/ethiopia_fi_forecast_final.csv')
 
+@st.cache_data(max_entries=8)
+def load_vintage(vintage_id):
+    """A past snapshot of the modeled data and forecast (see src/snapshots.py). Vintages never change."""
+    df_hist = snapshots.load_dataset(vintage_id, 'modeled')
+    df_hist['observation_date'] = pd.to_datetime(df_hist['observation_date'])
+    # Snapshots come back in record_id order; charts and exports expect date order
+    df_hist = df_hist.sort_values('observation_date', kind='mergesort').reset_index(drop=True)
+    df_hist['year'] = df_hist['observation_date'].dt.year
+    df_forecast = snapshots.load_dataset(vintage_id, 'forecast')
     return df_hist, df_forecast
 
 
+with st.sidebar:
+    vintage = st.selectbox("🗂️ Data Vintage", [LATEST] + [v['id'] for v in reversed(snapshots.list_vintages())],
+                           help="Recorded by each pipeline run. Pick one to see the data as it was then.")
+
 try:
-    df_hist, df_forecast = load_data()
-    # Filter for key indicators
-    access_data = df_hist[df_hist['indicator_code'] == 'ACC_OWNERSHIP']
-    telebirr_data = df_hist[df_hist['indicator_code'] == 'USG_TELEBIRR_USERS']
+    # Latest is the frame pair loaded above (one cached copy); past vintages come from the snapshot store
+    if vintage != LATEST:
+        df_hist, df_forecast = load_vintage(vintage)
 except FileNotFoundError:
     st.error("❌ Data files not found. Please run Task 3 and Task 4 first.")
     st.stop()
 
+# --- EXPORTS ---
+@st.cache_data(show_spinner="Preparing export...", max_entries=32)
+def cached_export(_df, dataset, version, fmt, indicators, year_range):
+    """
+    Serialized export, cached per (dataset, data version, format, filters).
+    `_df` is not hashed: `version` already changes whenever the file on disk does.
+    """
+    year_col = 'year' if dataset == 'history' else 'Year'
+    return exports.build_export(_df, fmt=fmt, indicators=indicators, year_range=year_range, year_col=year_col)
+
+
+@st.fragment
+def export_panel():
+    """
+    Sidebar download widget. Runs as a fragment so changing filters only reruns
+    this panel, and nothing is serialized until "Prepare Export" is clicked.
+    """
+    choice = st.selectbox("Dataset", ["Historical Data", "Forecast Data"])
+    fmt = st.selectbox("Format", list(exports.EXPORT_FORMATS),
+                       format_func=lambda f: exports.EXPORT_FORMATS[f]['label'])
+
+    if choice == "Historical Data":
+        dataset, df, path, stem, year_col = 'history', df_hist, DATA_PATH, "ethiopia_history", 'year'
+        codes = sorted(df_hist['indicator_code'].dropna().unique())
+        indicators = tuple(st.multiselect("Indicators (empty = all)", codes))
+    else:
+        dataset, df, path, stem, year_col = 'forecast', df_forecast, FORECAST_PATH, "ethiopia_forecast_2030", 'Year'
+        indicators = ()
+
+    years = df[year_col].dropna()
+    year_min, year_max = int(years.min()), int(years.max())
+    year_range = (year_min, year_max)
+    if year_min < year_max:
+        year_range = st.slider("Years", year_min, year_max, (year_min, year_max))
+
+    if vintage != LATEST:
+        stem = f"{stem}_{vintage}"
+    request = (dataset, exports.data_version(path) if vintage == LATEST else vintage, fmt, indicators, year_range)
+    if st.button("Prepare Export"):
+        st.session_state['export_request'] = request
+
+    if st.session_state.get('export_request') == request:
+        payload, rows = cached_export(df, *request)
+        st.download_button(f"Download {choice}", data=payload,
+                           file_name=exports.file_name(stem, fmt),
+                           mime=exports.EXPORT_FORMATS[fmt]['mime'])
+        st.caption(f"{rows} rows · {len(payload) / 1024:.1f} KB")
+
+
+# --- KPIs ---
+@st.cache_data
+def get_kpis(version, from_artifact=True):
+    """
+    Reads the KPI artifact written by the pipeline.
+    Falls back to computing it in memory when the artifact has not been built yet
+    (or when a past vintage is shown).
+    """
+    loaded = kpis.load_kpis() if from_artifact else None
+    if loaded is None:
+        loaded = kpis.compute_kpis(df_hist, df_forecast)['kpis']
+    return loaded
+
+
+def fmt_kpi(value, pattern):
+    """Formats a KPI value, showing 'n/a' when the source data is missing."""
+    return "n/a" if value is None else pattern.format(value)
+
+
+# --- DATA COVERAGE ---
+@st.cache_data
+def get_coverage(version):
+    """Coverage profile materialized by the pipeline (None if the stage hasn't run)."""
+    return coverage.load_coverage()
+
+
+# --- FIGURES ---
+@st.cache_data
+def load_prebuilt_figure(name, version):
+    """Plotly spec rendered by src/figures.py (None if the stage hasn't run)."""
+    return figures.load_figure(name, FIGURE_DIR)
+
+
+def show_figure(name, caption):
+    """Prebuilt interactive figure, falling back to its PNG, then to a notice."""
+    spec = load_prebuilt_figure(name, exports.data_version(os.path.join(FIGURE_DIR, 'manifest.json')))
+    png_path = os.path.join(FIGURE_DIR, f"{name}.png")
+    if spec is not None:
+        st.plotly_chart(spec, use_container_width=True)
+        st.caption(caption)
+    elif os.path.exists(png_path):
+        st.image(png_path, caption=caption, use_container_width=True)
+    else:
+        st.info(f"📉 '{caption}' has not been rendered yet. Run `python src/figures.py`.")
+
+
+# --- TRENDS ---
+TREND_DEFAULTS = ['ACC_OWNERSHIP', 'USG_TELEBIRR_USERS']
+
+
+@st.cache_resource(max_entries=2)
+def get_series_index(_df, version, latest=True):
+    """
+    Range index over the historical data. Memory-maps the pipeline's series store
+    when it is current (shared with the query service), else builds it in memory.
+    """
+    return timeseries.load_index(_df, source=DATA_PATH) if latest else timeseries.SeriesIndex(_df)
+
+
+def national_history(index, code):
+    """Observed national series of one indicator as a (year, value_numeric) frame."""
+    dates, values = index.window(code)
+    return pd.DataFrame({'year': pd.DatetimeIndex(dates).year, 'value_numeric': values})
+
+
+@st.cache_data(max_entries=128)
+def trend_figure(_index, version, indicators, year_range, chart_width):
+    """
+    Plotly spec for the Trends chart, cached per (indicators, year range, width).
+    Each series is downsampled server-side to the chart width, so the payload
+    stays bounded however dense the underlying data is.
+    Percentage indicators go on the left axis, counts and volumes on the right.
+    """
+    start, end = f"{year_range[0]}-01-01", f"{year_range[1]}-12-31"
+    fig = go.Figure()
+
+    for code in indicators:
+        dates, values = _index.window(code, start, end)
+        dates, values = timeseries.downsample(dates, values, max_points=chart_width)
+        unit = str(_index.units.get(code, ''))
+        fig.add_trace(go.Scatter(
+            x=dates, y=values, name=f"{code} ({unit})" if unit else code,
+            mode='lines+markers', yaxis='y' if '%' in unit else 'y2'
+        ))
+
+    fig.update_layout(
+        title="Traditional Banking vs. Mobile Adoption",
+        yaxis=dict(title="Percent (%)"),
+        yaxis2=dict(title="Users / Volume", overlaying='y', side='right'),
+        legend=dict(x=0, y=1.1, orientation='h')
+    )
+    return fig.to_dict()
+
+
 # --- SIDEBAR ---
 with st.sidebar:
     st.image(
@@ -92,12 +254,8 @@ with st.sidebar:
     st.markdown("---")
     st.subheader("💾 Data Download")
 
-    # Download Functionality
-    csv_hist = df_hist.to_csv(index=False).encode('utf-8')
-    st.download_button("Download Historical Data", data=csv_hist, file_name="ethiopia_history.csv", mime="text/csv")
-
-    csv_cast = df_forecast.to_csv(index=False).encode('utf-8')
-    st.download_button("Download Forecast Data", data=csv_cast, file_name="ethiopia_forecast_2030.csv", mime="text/csv")
+    # Download Functionality (serialized only on request, see export_panel)
+    export_panel()
 
     st.markdown("---")
     st.markdown("**Model Version:** 1.0.0")
@@ -109,27 +267,31 @@ if page == "📊 Executive Summary":
     st.title("🇪🇹 Ethiopia Financial Inclusion Outlook")
     st.markdown("### The 'Inclusion Paradox' (2021-2024)")
 
-    # KPIs
+    # KPIs (materialized at pipeline time, see src/kpis.py)
+    if vintage == LATEST:
+        kpi = get_kpis(exports.data_version(kpis.KPI_FILE))
+    else:
+        kpi = get_kpis(vintage, from_artifact=False)
     col1, col2, col3, col4 , col5 , col6 = st.columns(6)
     with col1:
-        st.metric("Official Access (2024)", "49.0%", "+3% vs 2021")
+        delta = f"{fmt_kpi(kpi.get('access_delta'), '{:+.0f}%')} vs {kpi.get('access_prev_year', 'n/a')}"
+        st.metric(f"Official Access ({kpi.get('access_year', 'n/a')})",
+                  fmt_kpi(kpi.get('access_latest'), '{:.1f}%'), delta)
     with col2:
-        st.metric("Telebirr Users", "54.0 M", "New Digital Base")
+        st.metric("Telebirr Users", fmt_kpi(kpi.get('usg_telebirr_users_latest'), '{:.1f} M'),
+                  f"{fmt_kpi(kpi.get('wallet_total'), '{:.1f} M')} wallets total", delta_color="off")
     with col3:
         # P2P / ATM Proxy Ratio (Digital Vol / Traditional Vol)
-        # Assuming proxy data exists or is derived
-        ratio_val = 12.5
-        st.metric("P2P/ATM Crossover", f"{ratio_val}x", "Digital Dominance")
+        st.metric("P2P/ATM Crossover", fmt_kpi(kpi.get('p2p_atm_ratio'), '{:.1f}x'), "Digital Dominance")
     with col4:
         # Growth Rate (CAGR of Digital)
-        cagr = 150.0
-        st.metric("Digital CAGR", f"+{cagr}%", "Hyper-Growth")
+        st.metric("Digital CAGR", fmt_kpi(kpi.get('digital_cagr'), '+{:.1f}%'), "Hyper-Growth")
     with col5:
-        st.metric("Forecast 2030 (Base)", f"{df_forecast[df_forecast['Year'] == 2030]['Base_Case'].values[0]}%",
-                  "Status Quo")
+        st.metric(f"Forecast {kpi.get('forecast_year', 2030)} (Base)",
+                  fmt_kpi(kpi.get('forecast_base_case'), '{:.1f}%'), "Status Quo")
     with col6:
-        st.metric("Forecast 2030 (Opt)", f"{df_forecast[df_forecast['Year'] == 2030]['Optimistic'].values[0]}%",
-                  "Digital Dividend")
+        st.metric(f"Forecast {kpi.get('forecast_year', 2030)} (Opt)",
+                  fmt_kpi(kpi.get('forecast_optimistic'), '{:.1f}%'), "Digital Dividend")
 
 
 
@@ -156,31 +318,15 @@ if page == "📊 Executive Summary":
     col1, col2 = st.columns(2)
 
     with col1:
-        st.image(
-            "data/figures/ethiopia_final_forecast.png",
-            caption="Ethiopian Financial Inclution Forecast",
-            use_container_width=True
-        )
+        show_figure("ethiopia_final_forecast", "Ethiopian Financial Inclution Forecast")
 
     with col2:
-        st.image(
-            "data/figures/Baselin_trend(log-linear).png",
-            caption="Baseline Trend (Log-linear)",
-            use_container_width=True
-        )
+        show_figure("baseline_trend", "Baseline Trend (Log-linear)")
     col3 , col4 = st.columns(2)
     with col3:
-        st.image(
-            "data/figures/External_driver()Telebirr impact.png",
-            caption="External_Driver (Telebirr)",
-            use_container_width=True
-        )
+        show_figure("driver_telebirr", "External_Driver (Telebirr)")
     with col4:
-        st.image(
-            "data/figures/Dual_engine_driver(T+M).png",
-            caption="External_Driver (Telebirr + M-pesa)",
-            use_container_width=True
-        )
+        show_figure("driver_dual_engine", "External_Driver (Telebirr + M-pesa)")
     st.info(
         "💡 **Insight:** While official account ownership stagnated, digital usage grew from 0 to 54M users. This 'Lag' is the primary opportunity for 2025.")
 
@@ -236,43 +382,42 @@ elif page == "📈 Trends & Channels":
     st.markdown("### 🗓️ Time Filter")
     year_range = st.slider("Select Year Range", 2014, 2028, (2018, 2024))
 
-    # Filter Data
-    mask = (df_hist['year'] >= year_range[0]) & (df_hist['year'] <= year_range[1])
-    filtered_df = df_hist.loc[mask]
-
     # Channel Comparison View
     st.markdown("### 📡 Channel Comparison")
 
-    # Create a comparison plot
-    fig = go.Figure()
-
-    # Channel 1: Bank Accounts (Access)
-    subset_acc = filtered_df[filtered_df['indicator_code'] == 'ACC_OWNERSHIP']
-    fig.add_trace(go.Bar(
-        x=subset_acc['year'], y=subset_acc['value_numeric'],
-        name='Bank Account Penetration (%)'
-    ))
-
-    # Channel 2: Mobile Money (Telebirr) - Scaled for comparison
-    # We plot it on secondary axis to compare "Shape" of growth
-    subset_mob = filtered_df[filtered_df['indicator_code'] == 'USG_TELEBIRR_USERS']
-    fig.add_trace(go.Scatter(
-        x=subset_mob['year'], y=subset_mob['value_numeric'],
-        name='Mobile Users (Millions)', yaxis='y2', line=dict(color='green', width=3)
-    ))
-
-    fig.update_layout(
-        title="Traditional Banking vs. Mobile Adoption",
-        yaxis=dict(title="Account %"),
-        yaxis2=dict(title="Users (Millions)", overlaying='y', side='right'),
-        legend=dict(x=0, y=1.1, orientation='h')
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    hist_version = exports.data_version(DATA_PATH) if vintage == LATEST else vintage
+    series_index = get_series_index(df_hist, hist_version, latest=vintage == LATEST)
+    defaults = [c for c in TREND_DEFAULTS if c in series_index.offsets]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        indicators = st.multiselect("Indicators", series_index.codes, default=defaults)
+    with col2:
+        chart_width = st.select_slider("Chart Resolution (px)", [400, 800, 1200, 1600, 2400],
+                                       value=timeseries.DEFAULT_CHART_WIDTH)
+
+    spec = trend_figure(series_index, hist_version, tuple(indicators), year_range, chart_width)
+    st.plotly_chart(spec, use_container_width=True)
+
+    # Which indicator/year cells actually have data
+    st.markdown("### 🧮 Data Coverage")
+    profile = get_coverage(exports.data_version(coverage.COVERAGE_FILE))
+    if profile is None:
+        st.info("Coverage profile not built yet. Run `python src/coverage.py`.")
+    else:
+        segments = sorted(profile['segment'].unique())
+        segment = st.selectbox("Segment", segments, format_func=lambda s: s or "National")
+        matrix = coverage.coverage_matrix(profile, segment)
+        fig_cov = px.imshow(matrix, color_continuous_scale='Blues', aspect='auto',
+                            labels={'x': 'Year', 'y': 'Indicator', 'color': 'Observations'})
+        st.plotly_chart(fig_cov, use_container_width=True)
+        st.caption("Empty cells have no observations for that year; forecasts on thin series are flagged at pipeline time.")
 
 
 # --- PAGE 3: FORECAST & SCENARIOS ---
 elif page == "🔮 Forecast & Scenarios":
     st.title("🔮 2030 Strategic Forecast")
+    hist_version = exports.data_version(DATA_PATH) if vintage == LATEST else vintage
+    access_data = national_history(get_series_index(df_hist, hist_version, latest=vintage == LATEST), 'ACC_OWNERSHIP')
 
     # Model Selection Option
     model_choice = st.radio("Select Model View:",
@@ -345,33 +490,17 @@ elif page == "🔮 Forecast & Scenarios":
     col1 , col2 = st.columns(2)
 
     with col1:
-        st.image(
-            "data/figures/ethiopia_final_forecast.png",
-            caption="Ethiopian Financial Inclution Forecast",
-            use_container_width=True
-        )
+        show_figure("ethiopia_final_forecast", "Ethiopian Financial Inclution Forecast")
     with col2:
-        st.image(
-            "data/figures/Forecast_ethiopian_financial_inclution(2025-2030).png",
-            caption="Ethiopian Financial Inclution Forecast",
-            use_container_width=True
-        )
+        show_figure("forecast_scenarios", "Ethiopian Financial Inclution Forecast")
 
     col3 , col4 = st.columns(2)
 
     with col3:
-        st.image(
-            "data/figures/mobile_money_explotion.png",
-            caption="Mobile money Boost",
-            use_container_width=True
-        )
+        show_figure("mobile_money_explosion", "Mobile money Boost")
 
     with col4:
-        st.image(
-            "data/figures/How_digital_drivers_change_the_trajectory.png",
-            caption=" How Digital Drivers Change The Trajectory",
-            use_container_width=True
-        )
+        show_figure("digital_drivers_trajectory", " How Digital Drivers Change The Trajectory")
 
     # Data Table
     st.subheader("Detailed Forecast Data")
@@ -401,26 +530,10 @@ elif page == "🎛️ Policy Simulator":
         fuel_compliance = st.slider("Gov Payment Compliance", 50, 100, 80, 5, format="%d%%")
 
     with col2:
-        # --- SIMULATION LOGIC ---
-        # 1. Calculate Total Addressable Market (TAM)
-        # Assume 20% overlap between Telebirr and M-Pesa
-        overlap = 0.20
-        unique_users = telebirr_pop + (mpesa_pop * (1 - overlap))
-
-        # 2. Calculate Implied Coverage (assuming ~68M adults in 2030)
-        adult_pop_2030 = 68.0
-        raw_coverage = (unique_users / adult_pop_2030) * 100
-
-        # 3. Apply "Active Conversion" Discount
-        # Base conversion is the slider (e.g., 60%)
-        # But high Fuel Compliance boosts this rate slightly (forced usage becomes habit)
-        compliance_boost = (fuel_compliance - 80) * 0.1
-        final_conversion = (active_rate + compliance_boost) / 100
-
-        final_inclusion = raw_coverage * final_conversion
-
-        # Cap at 100%
-        if final_inclusion > 100: final_inclusion = 100
+        # --- SIMULATION LOGIC (shared with the query service, see src/simulator.py) ---
+        result = simulator.simulate_inclusion(telebirr_pop, mpesa_pop, active_rate, fuel_compliance)
+        unique_users = result['unique_users']
+        final_inclusion = result['final_inclusion']
 
         # --- GAUGE CHART ---
         fig = go.Figure(go.Indicator(
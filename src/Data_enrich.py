@@ -2,35 +2,10 @@ import pandas as pd
 import numpy as np
 import os
 import sys
+import hashlib
 from datetime import datetime
 
-# --- 1. Dynamic Path Setup (Production Grade) ---
-# Get the folder where THIS script lives (i.e., .../week10/src)
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-
-# Go up one level to the project root (i.e., .../week10)
-PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
-
-# Define the data directory (i.e., .../week10/data/raw)
-DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'raw')
-
-print(f"📂 Looking for data in: {DATA_DIR}")
-
-# --- 2. Define File Paths ---
-# We join the directory with the EXACT filenames you uploaded
-FILE_MAIN = os.path.join(DATA_DIR, 'ethiopia_fi_unified_data.xlsx - ethiopia_fi_unified_data.csv')
-FILE_SHEET_B = os.path.join(DATA_DIR, 'Additional Data Points Guide.xlsx - B. Direct Corrln.csv')
-FILE_SHEET_C = os.path.join(DATA_DIR, 'Additional Data Points Guide.xlsx - C. Indirect Corrln.csv')
-#
-# def clean_year(val):
-#     """Helper to convert Year (e.g., 2011) to Date (2011-12-31)"""
-#     try:
-#         return pd.to_datetime(f"{int(val)}-12-31")
-#     except:
-#         return None
-
-# ... (The rest of your main() function stays exactly the same)
-
+import fileio
 
 # --- 1. System Configuration & Schema Definition ---
 
@@ -55,11 +30,12 @@ class ProjectSchema:
     ]
 
     @staticmethod
-    def enforce(df, source_tag="unknown"):
+    def enforce(df, source_tag="unknown", collection_date=None):
         """
         Applies the schema to a dataframe.
         Creates missing columns with NaN.
         Drops extra columns.
+        Missing collection dates get `collection_date` (default: today).
         """
         # 1. Add missing columns
         for col in ProjectSchema.COLUMNS:
@@ -70,11 +46,13 @@ class ProjectSchema:
         df_out = df[ProjectSchema.COLUMNS].copy()
 
         # 3. Add Audit Metadata if missing
+        # (object dtype: an all-NaN column is float64 and rejects strings on recent pandas)
+        df_out[['collected_by', 'collection_date']] = df_out[['collected_by', 'collection_date']].astype(object)
         mask_collected = df_out['collected_by'].isna()
         df_out.loc[mask_collected, 'collected_by'] = f"Pipeline_Ingest_{source_tag}"
 
         mask_date = df_out['collection_date'].isna()
-        df_out.loc[mask_date, 'collection_date'] = datetime.now().strftime('%Y-%m-%d')
+        df_out.loc[mask_date, 'collection_date'] = collection_date or datetime.now().strftime('%Y-%m-%d')
 
         return df_out
 
@@ -97,6 +75,42 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_DIR = os.path.dirname(SCRIPT_DIR)
 DATA_RAW = os.path.join(BASE_DIR, 'data', 'raw')
 DATA_PROCESSED = os.path.join(BASE_DIR, 'data', 'processed')
+# Schema-enforced copy of each raw file, keyed by its content hash
+SOURCE_CACHE = os.path.join(DATA_PROCESSED, 'sources')
+SOURCE_EXTENSIONS = ('.csv', '.xlsx')
+# The manual records were compiled once (see data_enrichment_log.md); stamping them with
+# the run date would make every day's dataset differ from the last
+MANUAL_COLLECTION_DATE = '2026-01-30'
+
+
+def load_source(path, source_tag, cache_dir=SOURCE_CACHE):
+    """
+    Reads one raw file and applies the schema.
+    The result is cached under the file's content hash, so on re-ingest only
+    new or changed files are parsed. Returns (df, parsed) where `parsed` is False
+    on a cache hit, or (None, parsed) if the file is not in the project schema.
+    """
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    name = os.path.basename(path)
+    cached = f"{name}.{digest}.csv"
+    cache_path = os.path.join(cache_dir, cached)
+    if os.path.exists(cache_path):
+        return pd.read_csv(cache_path), False
+
+    df = pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path)
+    if 'record_type' not in df.columns:
+        return None, True
+    df_clean = ProjectSchema.enforce(df, source_tag=source_tag)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with fileio.atomic_write(cache_path) as f:
+        df_clean.to_csv(f, index=False)
+    # Drop cached versions of this file's previous content
+    for old in os.listdir(cache_dir):
+        if old != cached and old.startswith(f"{name}.") and len(old) == len(cached):
+            os.remove(os.path.join(cache_dir, old))
+    return df_clean, True
 
 
 # --- 3. Data Generators ---
@@ -228,6 +242,7 @@ def get_manual_enrichment():
 
 def main():
     print("--- 🚀 Starting Production Ingestion Pipeline ---")
+    print(f"📂 Looking for data in: {DATA_RAW}")
 
     # A. Load Main Dataset
     # -----------------------------------------------------
@@ -243,29 +258,52 @@ def main():
     print(f"📄 Loading Primary Source: {unified_files[0]}")
 
     try:
-        if main_path.endswith('.csv'):
-            df_main = pd.read_csv(main_path)
-        else:
-            df_main = pd.read_excel(main_path)
+        df_main_clean, parsed = load_source(main_path, source_tag="Official_Unified")
     except Exception as e:
         print(f"❌ Error reading primary source: {e}")
         sys.exit(1)
+    if df_main_clean is None:
+        print("❌ CRITICAL: Primary source has no 'record_type' column.")
+        sys.exit(1)
+    print(f"   -> Validated {len(df_main_clean)} rows{'' if parsed else ' (unchanged, cached)'}.")
 
-    # Apply Schema
-    df_main_clean = ProjectSchema.enforce(df_main, source_tag="Official_Unified")
-    print(f"   -> Validated {len(df_main_clean)} rows.")
+    # A2. Supplementary Sources (operator/regulator drops in data/raw)
+    # -----------------------------------------------------
+    extra_frames = []
+    for name in sorted(os.listdir(DATA_RAW)):
+        path = os.path.join(DATA_RAW, name)
+        # Every copy of the unified dataset (.csv and .xlsx) is the primary source, not a supplement
+        if 'unified' in name.lower() or name.startswith(('.', '~$')) or not name.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        try:
+            df_extra, parsed = load_source(path, source_tag=os.path.splitext(name)[0])
+        except Exception as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        if df_extra is None:
+            continue  # Reference tables etc. are not observation sources
+        extra_frames.append(df_extra)
+        print(f"📄 Supplementary Source: {name} ({len(df_extra)} rows{', parsed' if parsed else ', cached'})")
 
     # B. Load Manual Enrichments (Events + Proxies)
     # -----------------------------------------------------
     print("🛠️  Injecting Manual High-Confidence Data...")
     df_manual = get_manual_enrichment()
-    df_manual_clean = ProjectSchema.enforce(df_manual, source_tag="Manual_Inject")
+    df_manual_clean = ProjectSchema.enforce(df_manual, source_tag="Manual_Inject",
+                                            collection_date=MANUAL_COLLECTION_DATE)
 
     print(f"   -> Added {len(df_manual_clean)} manual records (Events + Proxy Observations).")
 
     # C. Merge
     # -----------------------------------------------------
-    df_final = pd.concat([df_main_clean, df_manual_clean], ignore_index=True)
+    df_final = pd.concat([df_main_clean] + extra_frames + [df_manual_clean], ignore_index=True)
+
+    # A record re-sent in a later file replaces the earlier copy (rows without an ID are kept as-is)
+    has_id = df_final['record_id'].notna()
+    deduped = df_final[has_id].drop_duplicates('record_id', keep='last')
+    if len(deduped) < has_id.sum():
+        print(f"   -> Dropped {has_id.sum() - len(deduped)} duplicate record(s) by record_id.")
+    df_final = pd.concat([deduped, df_final[~has_id]]).sort_index()
 
     # D. Logic Validation
     # -----------------------------------------------------
@@ -277,13 +315,14 @@ def main():
     if not os.path.exists(DATA_PROCESSED):
         os.makedirs(DATA_PROCESSED)
 
-    output_path = os.path.join(DATA_PROCESSED, 'ethiopia_fi_enrichedv1.csv')
+    output_path = os.path.join(DATA_PROCESSED, 'ethiopia_fi_enriched.csv')
 
     # Sort for cleanliness
     df_final['observation_date'] = pd.to_datetime(df_final['observation_date'])
-    df_final = df_final.sort_values('observation_date')
+    df_final = df_final.sort_values('observation_date', kind='mergesort')
 
-    df_final.to_csv(output_path, index=False)
+    with fileio.atomic_write(output_path) as f:
+        df_final.to_csv(f, index=False)
 
     print("\n" + "=" * 50)
     print(f"✅ PIPELINE SUCCESS.")
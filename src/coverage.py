@@ -0,0 +1,203 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import exports
+import fileio
+import fingerprints
+import timeseries
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_enriched.csv')
+COVERAGE_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'coverage.csv.gz')
+# Fingerprints of the rows already profiled, so an ingest only profiles what is new
+ROWS_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'coverage_rows.json')
+
+KEYS = ['indicator_code', 'year', 'segment']
+PROFILED_COLS = ['record_type', 'indicator_code', 'observation_date', 'gender', 'location', 'source_type', 'confidence']
+SOURCE_PREFIX = 'src_'
+CONFIDENCE_PREFIX = 'conf_'
+CONFIDENCE_SCORES = {'high': 3, 'medium': 2, 'low': 1}
+
+# Default bar for "enough history to fit a trend"
+MIN_YEARS = 3
+
+
+# --- 1. Profiling ---
+
+def profile(df):
+    """
+    Coverage cells for the observation rows of `df`, in one groupby pass.
+    One row per non-empty (indicator, year, segment) cell with the observation
+    count, latest date, a count per source type and per confidence level.
+    All columns are additive (or a max), so profiles of disjoint row sets merge exactly.
+    """
+    obs = df[df['record_type'] == 'observation'] if 'record_type' in df.columns else df
+    dates = pd.to_datetime(obs['observation_date'], errors='coerce')
+    valid = dates.notna() & obs['indicator_code'].notna()
+    obs, dates = obs[valid], dates[valid]
+
+    def category(col):
+        if col not in obs.columns:
+            return pd.Series('unknown', index=obs.index)
+        return obs[col].fillna('unknown').astype(str).str.strip().str.lower().replace('', 'unknown')
+
+    frame = pd.DataFrame({
+        'indicator_code': obs['indicator_code'].astype(str),
+        'year': dates.dt.year.astype('int64'),
+        'segment': timeseries.segment_labels(obs),
+        'latest_date': dates,
+    })
+    dummies = pd.concat([
+        pd.get_dummies(category('source_type'), prefix=SOURCE_PREFIX[:-1], dtype='int64'),
+        pd.get_dummies(category('confidence'), prefix=CONFIDENCE_PREFIX[:-1], dtype='int64'),
+    ], axis=1)
+    frame = pd.concat([frame, dummies], axis=1)
+
+    grouped = frame.groupby(KEYS, sort=True)
+    cells = grouped[list(dummies.columns)].sum()
+    cells.insert(0, 'count', grouped.size())
+    cells.insert(1, 'latest_date', grouped['latest_date'].max())
+    return _finalize(cells.reset_index())
+
+
+def _finalize(cells):
+    """Consistent column order, zero-filled counts and the derived confidence score."""
+    counts = sorted(c for c in cells.columns if c.startswith((SOURCE_PREFIX, CONFIDENCE_PREFIX)))
+    cells[counts] = cells[counts].fillna(0).astype('int64')
+    cells['latest_date'] = pd.to_datetime(cells['latest_date'])
+
+    # Mean confidence over rows with a known level (high=3 ... low=1)
+    known = pd.Series(0, index=cells.index)
+    weighted = pd.Series(0, index=cells.index)
+    for level, score in CONFIDENCE_SCORES.items():
+        col = f"{CONFIDENCE_PREFIX}{level}"
+        if col in cells.columns:
+            known += cells[col]
+            weighted += cells[col] * score
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cells['confidence_score'] = np.round(np.where(known > 0, weighted / known, np.nan), 2)
+
+    cells = cells[KEYS + ['count', 'latest_date', 'confidence_score'] + counts]
+    return cells.sort_values(KEYS, kind='mergesort').reset_index(drop=True)
+
+
+def update_coverage(coverage, new_rows):
+    """
+    Incremental refresh: profiles only `new_rows` and folds them into `coverage`.
+    Cost is O(new rows + touched cells). Rows are assumed to be new observations,
+    not revisions of rows already counted.
+    """
+    delta = profile(new_rows)
+    if coverage is None or coverage.empty:
+        return delta
+    merged = pd.concat([coverage.drop(columns='confidence_score'), delta.drop(columns='confidence_score')],
+                       ignore_index=True)
+    counts = [c for c in merged.columns if c not in KEYS + ['latest_date']]
+    merged[counts] = merged[counts].fillna(0)
+
+    grouped = merged.groupby(KEYS, sort=True)
+    cells = grouped[counts].sum()
+    cells.insert(1, 'latest_date', grouped['latest_date'].max())
+    return _finalize(cells.reset_index())
+
+
+def refresh_coverage(df, coverage=None, seen=None):
+    """
+    Brings `coverage` in line with `df`. Only rows not seen by the last run are
+    profiled; if any previously seen row was removed or edited, falls back to a
+    full rebuild. Returns (coverage, fingerprints, number of rows profiled).
+    """
+    current = fingerprints.row_fingerprints(df, PROFILED_COLS)
+    new_rows = fingerprints.unseen_rows(df, seen, PROFILED_COLS) if coverage is not None and seen is not None else None
+    if new_rows is None:
+        return profile(df), current, len(df)
+    if new_rows.empty:
+        return coverage, current, 0
+    return update_coverage(coverage, new_rows), current, len(new_rows)
+
+
+# --- 2. Queries ---
+
+def coverage_matrix(coverage, segment='', value='count'):
+    """Indicator x year grid for one segment ('' = national); empty cells are 0."""
+    cells = coverage[coverage['segment'] == segment]
+    if cells.empty:
+        return pd.DataFrame()
+    matrix = cells.pivot(index='indicator_code', columns='year', values=value)
+    years = range(int(matrix.columns.min()), int(matrix.columns.max()) + 1)
+    return matrix.reindex(columns=years).fillna(0 if value == 'count' else np.nan)
+
+
+def sufficiency(coverage, code, segment='', since=None, min_years=MIN_YEARS):
+    """
+    Data-sufficiency check for one series: which years have observations,
+    which years in the span are empty, and whether there are at least `min_years`.
+    """
+    cells = coverage[(coverage['indicator_code'] == code) & (coverage['segment'] == segment)]
+    if since is not None:
+        cells = cells[cells['year'] >= since]
+    years = sorted(int(y) for y in cells['year'])
+    missing = sorted(set(range(years[0], years[-1] + 1)) - set(years)) if years else []
+    return {
+        'indicator_code': code,
+        'segment': segment,
+        'years': years,
+        'missing_years': missing,
+        'observations': int(cells['count'].sum()),
+        'latest_date': cells['latest_date'].max().strftime('%Y-%m-%d') if years else None,
+        'sufficient': len(years) >= min_years,
+    }
+
+
+# --- 3. Storage ---
+
+def save_coverage(coverage, path=COVERAGE_FILE, seen=None, rows_path=ROWS_FILE):
+    """
+    Deterministic gzip CSV, swapped in atomically.
+    The row fingerprints go last, so they never claim rows the table doesn't count.
+    """
+    out = coverage.copy()
+    out['latest_date'] = out['latest_date'].dt.strftime('%Y-%m-%d')
+    with fileio.atomic_write(path, 'wb') as f:
+        f.write(exports.to_bytes(out, 'csv.gz'))
+
+    if seen is not None:
+        fingerprints.save_seen(seen, rows_path)
+
+
+def load_coverage(path=COVERAGE_FILE):
+    """Returns the coverage table, or None if the stage has not run yet."""
+    if not os.path.exists(path):
+        return None
+    # '' is the national segment, not a missing value
+    coverage = pd.read_csv(path, keep_default_na=False, na_values={'confidence_score': ['']})
+    return _finalize(coverage)
+
+
+def main():
+    print("--- Profiling Data Coverage ---")
+
+    if not os.path.exists(INPUT_FILE):
+        print("❌ CRITICAL: Enriched data not found. Run Data_enrich.py first.")
+        sys.exit(1)
+    df = pd.read_csv(INPUT_FILE)
+
+    coverage, seen, profiled = refresh_coverage(df, load_coverage(), fingerprints.load_seen(ROWS_FILE))
+    save_coverage(coverage, seen=seen)
+
+    national = coverage[coverage['segment'] == '']
+    print(f"✅ Success! {len(coverage)} cells across {coverage['indicator_code'].nunique()} indicators "
+          f"({profiled} of {len(df)} rows profiled).")
+    thin = [code for code, years in national.groupby('indicator_code')['year'].nunique().items() if years < MIN_YEARS]
+    if thin:
+        print(f"⚠️ Fewer than {MIN_YEARS} years of national data: {', '.join(thin)}")
+    print(f"   Saved to: {COVERAGE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
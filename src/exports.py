@@ -0,0 +1,85 @@
+import io
+import os
+import hashlib
+import importlib.util
+
+import pandas as pd
+
+# --- Configuration ---
+# Compressed CSV is always available. Parquet needs pyarrow (or fastparquet),
+# so it is only offered when one of the engines is installed.
+PARQUET_AVAILABLE = any(
+    importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet')
+)
+
+EXPORT_FORMATS = {
+    'csv.gz': {'label': 'CSV (gzip)', 'mime': 'application/gzip'},
+    'csv': {'label': 'CSV (plain)', 'mime': 'text/csv'},
+}
+if PARQUET_AVAILABLE:
+    EXPORT_FORMATS['parquet'] = {'label': 'Parquet (columnar)', 'mime': 'application/vnd.apache.parquet'}
+
+
+def data_version(*paths):
+    """
+    Cheap fingerprint of the files backing a dataset.
+    Uses (path, size, mtime) so it changes whenever a stage rewrites its output,
+    without reading the file contents.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8'))
+        except FileNotFoundError:
+            digest.update(f"{path}|missing".encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def filter_frame(df, indicators=None, year_range=None, year_col='year'):
+    """
+    Returns the subset the user asked for.
+    indicators: iterable of indicator_code values (None = all).
+    year_range: inclusive (start, end) tuple applied to `year_col` (None = all).
+    """
+    mask = pd.Series(True, index=df.index)
+
+    if indicators and 'indicator_code' in df.columns:
+        mask &= df['indicator_code'].isin(list(indicators))
+
+    if year_range is not None and year_col in df.columns:
+        mask &= df[year_col].between(year_range[0], year_range[1])
+
+    return df.loc[mask]
+
+
+def to_bytes(df, fmt='csv.gz'):
+    """Serializes a dataframe into one of the EXPORT_FORMATS."""
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        raise ValueError("Parquet export needs pyarrow or fastparquet installed")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    buffer = io.BytesIO()
+    if fmt == 'csv.gz':
+        # mtime=0 keeps the archive byte-identical for identical data
+        df.to_csv(buffer, index=False, compression={'method': 'gzip', 'mtime': 0})
+    elif fmt == 'csv':
+        df.to_csv(buffer, index=False, encoding='utf-8')
+    else:
+        df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def file_name(stem, fmt):
+    """Builds the download file name, e.g. ethiopia_history.csv.gz"""
+    return f"{stem}.{fmt}"
+
+
+def build_export(df, fmt='csv.gz', indicators=None, year_range=None, year_col='year'):
+    """
+    Filters and serializes in one call.
+    Returns (payload_bytes, row_count).
+    """
+    subset = filter_frame(df, indicators=indicators, year_range=year_range, year_col=year_col)
+    return to_bytes(subset, fmt), len(subset)
@@ -0,0 +1,273 @@
+"""
+fi: single command-line entry point for the forecasting pipeline.
+
+    python src/fi.py --help
+    python src/fi.py status
+    python src/fi.py run [--force]
+    python src/fi.py ingest | impact | forecast [--force]
+    python src/fi.py watch [--debounce 5]
+    python src/fi.py simulate --telebirr 75 --mpesa 15
+    python src/fi.py export history --format csv.gz --years 2018-2024
+    python src/fi.py vintages | diff previous latest --dataset forecast
+
+Only the standard library is imported at module level. pandas, statsmodels,
+matplotlib etc. are imported inside the subcommand that needs them, so
+--help, status and up-to-date pipeline runs stay fast (see `fi importtime`).
+"""
+import argparse
+import os
+import sys
+import time
+
+import pipeline
+import simulator
+
+# --- Configuration ---
+# Modules that must never be loaded on the fast paths
+HEAVY_MODULES = ('pandas', 'numpy', 'scipy', 'statsmodels', 'matplotlib', 'seaborn', 'plotly', 'streamlit')
+IMPORT_PROBES = [['--help'], ['status'], ['simulate']]
+IMPORT_BUDGET_MS = 100
+
+
+# --- 1. Pipeline Commands ---
+
+def _run_stages(targets, force):
+    results = pipeline.run(targets=targets, force=force)
+    return 1 if any(r in ('failed', 'blocked') for r in results.values()) else 0
+
+
+def cmd_run(args):
+    return _run_stages(args.stages or None, args.force)
+
+
+def cmd_ingest(args):
+    return _run_stages(['enrich'], args.force)
+
+
+def cmd_impact(args):
+    return _run_stages(['impact'], args.force)
+
+
+def cmd_forecast(args):
+    return _run_stages(['forecast'], args.force)
+
+
+def cmd_watch(args):
+    import asyncio
+    import watch
+
+    watcher = watch.Watcher(poll=args.poll, debounce=args.debounce, targets=args.stages or None)
+    print(f"👀 Watching {watcher.directory} (debounce {args.debounce:.0f}s, Ctrl+C to stop)")
+    try:
+        asyncio.run(watcher.watch())
+    except KeyboardInterrupt:
+        print("\n🛑 Watch stopped.")
+    finally:
+        watcher.close()
+    return 0
+
+
+def cmd_status(args):
+    for name, state in pipeline.status().items():
+        icon = '✅' if state == 'up to date' else '⚠️ '
+        print(f"{icon} {name:<12} {state}")
+    return 0
+
+
+# --- 2. Query Commands ---
+
+def cmd_simulate(args):
+    result = simulator.simulate_inclusion(args.telebirr, args.mpesa, args.active_rate, args.fuel_compliance)
+    gap = result['final_inclusion'] - simulator.NATIONAL_TARGET
+    print(f"   Unique users:      {result['unique_users']:.1f} M")
+    print(f"   Raw coverage:      {result['raw_coverage']:.1f}%")
+    print(f"   Active conversion: {result['final_conversion'] * 100:.1f}%")
+    print(f"   Projected 2030:    {result['final_inclusion']:.1f}% ({gap:+.1f} pts vs {simulator.NATIONAL_TARGET:.0f}% target)")
+    return 0
+
+
+def cmd_export(args):
+    import pandas as pd
+    import exports
+    import kpis  # Owns the processed file locations
+
+    if args.dataset == 'history':
+        path, stem, year_col = kpis.MODELED_FILE, 'ethiopia_history', 'year'
+    else:
+        path, stem, year_col = kpis.FORECAST_FILE, 'ethiopia_forecast_2030', 'Year'
+    if not os.path.exists(path):
+        print(f"❌ CRITICAL: {path} not found. Run the pipeline first.")
+        return 1
+
+    df = pd.read_csv(path)
+    if args.dataset == 'history':
+        df['year'] = pd.to_datetime(df['observation_date'], errors='coerce').dt.year
+
+    indicators = [c for c in (args.indicators or '').split(',') if c] or None
+    try:
+        year_range = None
+        if args.years:
+            start, _, end = args.years.partition('-')
+            if not (start.isdigit() and (end.isdigit() or not end)):
+                raise ValueError(f"Invalid --years '{args.years}': expected a year or range, e.g. 2018-2024")
+            year_range = (int(start), int(end or start))
+        payload, rows = exports.build_export(df, fmt=args.format, indicators=indicators,
+                                             year_range=year_range, year_col=year_col)
+    except ValueError as e:
+        # Bad --years, or a format whose engine isn't installed (parquet without pyarrow)
+        print(f"❌ {e}")
+        return 1
+    out_path = args.output or exports.file_name(stem, args.format)
+    with open(out_path, 'wb') as f:
+        f.write(payload)
+    print(f"✅ Exported {rows} rows ({len(payload) / 1024:.1f} KB) to {out_path}")
+    return 0
+
+
+def cmd_vintages(args):
+    import snapshots
+
+    vintages = snapshots.list_vintages()
+    if not vintages:
+        print("No vintages recorded yet. Run the pipeline first.")
+    for vintage in vintages:
+        rows = ', '.join(f"{name} {n}" for name, n in vintage['rows'].items())
+        print(f"   {vintage['id']}  ({rows})")
+    return 0
+
+
+def cmd_diff(args):
+    import snapshots
+
+    for dataset in args.dataset or list(snapshots.DATASETS):
+        try:
+            changes = snapshots.diff(args.old, args.new, dataset)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        print(f"📄 {dataset}: +{len(changes['added'])} -{len(changes['removed'])} "
+              f"~{changes['modified']['key'].nunique()} rows ({changes['chunks_read']} chunks read)")
+        if not changes['modified'].empty:
+            print(changes['modified'].head(args.limit).to_string(index=False))
+    return 0
+
+
+# --- 3. Import-Time Report ---
+
+def _parse_importtime(stderr):
+    """Top-level entries from `python -X importtime`: [(cumulative_us, module)]."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), name[1:].rstrip()))  # Keep the nesting indent
+    return entries
+
+
+def cmd_importtime(args):
+    """
+    Runs each fast-path command in a fresh interpreter and reports wall time and
+    the heaviest imports. Fails if a heavy module leaks in or the budget is exceeded.
+    """
+    import subprocess
+
+    print(f"--- Import-Time Report (budget {args.budget_ms} ms) ---")
+    failed = False
+
+    for probe in IMPORT_PROBES:
+        cmd = [sys.executable, os.path.abspath(__file__)] + probe
+        walls = []
+        for _ in range(3):
+            start = time.perf_counter()
+            subprocess.run(cmd, capture_output=True, check=False)
+            walls.append((time.perf_counter() - start) * 1000)
+        wall = min(walls)
+
+        traced = subprocess.run([sys.executable, '-X', 'importtime'] + cmd[1:], capture_output=True, text=True)
+        entries = _parse_importtime(traced.stderr)
+        top_level = [(us, name) for us, name in entries if not name.startswith(' ')]
+        heavy = sorted({name.strip().split('.')[0] for _, name in entries} & set(HEAVY_MODULES))
+
+        ok = wall <= args.budget_ms and not heavy
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} fi {' '.join(probe):<10} {wall:6.1f} ms wall, "
+              f"{sum(us for us, _ in top_level) / 1000:6.1f} ms imports")
+        for us, name in sorted(top_level, reverse=True)[:args.top]:
+            print(f"      {us / 1000:6.1f} ms  {name.strip()}")
+        if heavy:
+            print(f"      heavy modules loaded: {', '.join(heavy)}")
+
+    return 1 if failed else 0
+
+
+# --- 4. Entry Point ---
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='fi', description="Ethiopia financial inclusion forecasting pipeline.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help="Run the pipeline DAG, skipping stages whose inputs are unchanged")
+    p.add_argument('stages', nargs='*', help="Target stages (default: all)")
+    p.add_argument('--force', action='store_true', help="Rerun even if up to date")
+    p.set_defaults(func=cmd_run)
+
+    for name, func, help_text in [
+        ('ingest', cmd_ingest, "Enrich the raw unified dataset (Task 1)"),
+        ('impact', cmd_impact, "Add structural impact links (Task 3)"),
+        ('forecast', cmd_forecast, "Fit the forecasting ensemble (Task 4)"),
+    ]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--force', action='store_true', help="Rerun even if up to date")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser('watch', help="Re-run the pipeline whenever data/raw changes")
+    p.add_argument('stages', nargs='*', help="Target stages (default: all)")
+    p.add_argument('--debounce', type=float, default=5.0, help="Seconds of quiet after a change before running")
+    p.add_argument('--poll', type=float, default=1.0, help="Seconds between directory scans")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser('status', help="Show which stages are up to date")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser('simulate', help="Policy simulator: projected 2030 inclusion")
+    p.add_argument('--telebirr', type=float, default=75, help="Telebirr users in 2030 (millions)")
+    p.add_argument('--mpesa', type=float, default=15, help="M-Pesa users in 2030 (millions)")
+    p.add_argument('--active-rate', type=float, default=60, help="Active user conversion (%%)")
+    p.add_argument('--fuel-compliance', type=float, default=80, help="Gov payment compliance (%%)")
+    p.set_defaults(func=cmd_simulate)
+
+    p = sub.add_parser('export', help="Export processed data")
+    p.add_argument('dataset', choices=['history', 'forecast'])
+    p.add_argument('--format', default='csv.gz', choices=['csv.gz', 'csv', 'parquet'],
+                   help="parquet needs pyarrow or fastparquet")
+    p.add_argument('--indicators', help="Comma-separated indicator codes (history only)")
+    p.add_argument('--years', help="Year or range, e.g. 2018-2024")
+    p.add_argument('-o', '--output', help="Output path (default: ./<dataset>.<format>)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('vintages', help="List recorded dataset snapshots")
+    p.set_defaults(func=cmd_vintages)
+
+    p = sub.add_parser('diff', help="Row-level changes between two vintages")
+    p.add_argument('old', help="Vintage id, or 'previous'")
+    p.add_argument('new', nargs='?', default='latest', help="Vintage id (default: latest)")
+    p.add_argument('--dataset', action='append', help="enriched, modeled or forecast (default: all)")
+    p.add_argument('--limit', type=int, default=20, help="Changed cells to print per dataset")
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser('importtime', help="Report startup import cost of the fast paths")
+    p.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    p.add_argument('--top', type=int, default=5, help="Heaviest imports to list per command")
+    p.set_defaults(func=cmd_importtime)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
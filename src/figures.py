@@ -0,0 +1,335 @@
+import pandas as pd
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import fileio
+import forecast
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeled.csv')
+FIGURE_DIR = os.path.join(BASE_DIR, 'data', 'figures')
+MANIFEST_FILE = os.path.join(FIGURE_DIR, 'manifest.json')
+
+# Bump when the renderers change so every figure is redrawn once
+RENDERER_VERSION = 1
+
+EVENT_MARKERS = [(2021, "Telebirr Launch"), (2023, "M-Pesa / Fuel Mandate")]
+
+
+# --- 1. Figure Specs ---
+# Each builder turns the model outputs into a plain, JSON-serializable spec.
+# The spec is the figure's complete input: its hash decides whether to redraw.
+
+def _points(x, y, label, color='black'):
+    return {'kind': 'points', 'x': list(map(float, x)), 'y': list(map(float, y)), 'label': label, 'color': color}
+
+
+def _line(x, y, label, color, dash=None):
+    return {'kind': 'line', 'x': list(map(float, x)), 'y': list(map(float, y)), 'label': label,
+            'color': color, 'dash': dash}
+
+
+def _band(x, lower, upper, label, color):
+    return {'kind': 'band', 'x': list(map(float, x)), 'lower': list(map(float, lower)),
+            'upper': list(map(float, upper)), 'label': label, 'color': color}
+
+
+def _marker(x, y, label, color):
+    return {'kind': 'marker', 'x': [float(x)], 'y': [float(y)], 'label': label, 'color': color}
+
+
+def _vline(x, label=None):
+    return {'kind': 'vline', 'x': float(x), 'label': label}
+
+
+def _history(models):
+    return _points(models['target']['year'], models['target']['access_rate'], 'Historical Data')
+
+
+def spec_baseline_trend(models, df):
+    trend = models['trend']
+    return {
+        'title': 'Model 1: Baseline Trend (Log-Linear)', 'ylabel': 'Account Ownership (%)', 'ylim': [0, 100],
+        'layers': [
+            _band(trend['year'], trend['lower'], trend['upper'], '95% Confidence Interval', 'blue'),
+            _history(models),
+            _line(trend['year'], trend['mean'], 'Log-Linear Trend', 'blue'),
+        ],
+    }
+
+
+def spec_driver_telebirr(models, df):
+    return {
+        'title': 'Model 2: External Driver (Telebirr Impact)', 'ylabel': 'Account Ownership (%)', 'ylim': [0, 100],
+        'layers': [
+            _history(models),
+            _marker(forecast.ANCHOR_YEAR, models['single_anchor'], 'Telebirr Anchor (Proxy)', 'green'),
+            _line(models['years'], models['single_path'], 'Driver-Augmented Path', 'green', 'dash'),
+        ],
+    }
+
+
+def spec_driver_dual_engine(models, df):
+    return {
+        'title': 'Model 2: Dual-Engine Driver (Telebirr + M-Pesa)', 'ylabel': 'Account Ownership (%)',
+        'ylim': [0, 100],
+        'layers': [
+            _history(models),
+            _marker(forecast.ANCHOR_YEAR, models['dual_anchor'], 'Combined Anchor (Telebirr + M-Pesa)', 'purple'),
+            _line(models['years'], models['dual_path'], 'Dual-Engine Path', 'purple', 'dash'),
+        ],
+    }
+
+
+def spec_final_forecast(models, df):
+    s = models['scenarios']
+    return {
+        'title': 'Final Forecast: Ethiopia Financial Inclusion (2025–2030)', 'ylabel': 'Account Ownership (%)',
+        'ylim': [0, 100],
+        'layers': [
+            _band(s['Year'], s['Pessimistic'], s['Optimistic'], 'Scenario Range', 'blue'),
+            _history(models),
+            _line(s['Year'], s['Base_Case'], 'Base Forecast (Trend)', '#1f77b4'),
+            _line(s['Year'], s['Optimistic'], 'Optimistic (Telebirr Driven)', 'green', 'dash'),
+            _line(s['Year'], s['Pessimistic'], 'Pessimistic (Lower Bound)', 'red', 'dash'),
+            _vline(models['target']['year'].max()),
+        ],
+    }
+
+
+def spec_forecast_scenarios(models, df):
+    s = models['scenarios']
+    s = s[s['Year'] >= models['target']['year'].max()]
+    return {
+        'title': 'Ethiopia Financial Inclusion Scenarios (2025-2030)', 'ylabel': 'Account Ownership (%)',
+        'ylim': [0, 100],
+        'layers': [
+            _band(s['Year'], s['Pessimistic'], s['Optimistic'], 'Uncertainty', 'green'),
+            _line(s['Year'], s['Base_Case'], 'Base Case (Trend)', '#1f77b4'),
+            _line(s['Year'], s['Optimistic'], 'Optimistic (Policy Driven)', 'green', 'dash'),
+            _line(s['Year'], s['Pessimistic'], 'Pessimistic', 'red', 'dot'),
+        ],
+    }
+
+
+def spec_digital_drivers_trajectory(models, df):
+    s = models['scenarios']
+    return {
+        'title': 'The Opportunity: How Digital Drivers Change the Trajectory', 'ylabel': 'Account Ownership (%)',
+        'ylim': [0, 100],
+        'layers': [
+            _band(s['Year'], s['Base_Case'], s['Optimistic'], 'Digital Dividend (Opportunity)', 'green'),
+            _line(s['Year'], s['Base_Case'], 'Base Case (Trend)', '#1f77b4'),
+            _line(s['Year'], s['Optimistic'], 'Optimistic (Dual-Engine)', 'green', 'dash'),
+        ] + [_vline(yr, label) for yr, label in EVENT_MARKERS],
+    }
+
+
+def spec_mobile_money_explosion(models, df):
+    layers = []
+    for code, label, color in [('USG_TELEBIRR_USERS', 'Telebirr', '#e67e22'), ('USG_MPESA_USERS', 'M-Pesa', '#27ae60')]:
+        rows = df[(df['record_type'] == 'observation') & (df['indicator_code'] == code)].dropna(subset=['value_numeric'])
+        dates = pd.to_datetime(rows['observation_date'])
+        rows = rows.assign(x=dates.dt.year + (dates.dt.dayofyear - 1) / 365.25).sort_values('x')
+        layers.append(_line(rows['x'], rows['value_numeric'], label, color))
+    return {
+        'title': 'The "Usage Boom": Telebirr vs. M-Pesa', 'ylabel': 'Registered Users (Millions)', 'ylim': None,
+        'layers': layers,
+    }
+
+
+FIGURES = {
+    'ethiopia_final_forecast': spec_final_forecast,
+    'baseline_trend': spec_baseline_trend,
+    'driver_telebirr': spec_driver_telebirr,
+    'driver_dual_engine': spec_driver_dual_engine,
+    'forecast_scenarios': spec_forecast_scenarios,
+    'mobile_money_explosion': spec_mobile_money_explosion,
+    'digital_drivers_trajectory': spec_digital_drivers_trajectory,
+}
+
+
+def spec_hash(spec):
+    """Content hash of a figure's inputs (plus renderer version)."""
+    payload = json.dumps({'renderer': RENDERER_VERSION, 'spec': spec}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+# --- 2. Renderers ---
+
+MPL_DASH = {None: '-', 'dash': '--', 'dot': ':'}
+
+
+def to_matplotlib(spec):
+    # Imported here so runs where every figure is cached never load matplotlib
+    import matplotlib
+    matplotlib.use('Agg')  # Headless: the stage runs without a display
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for layer in spec['layers']:
+        kind = layer['kind']
+        if kind == 'points':
+            ax.scatter(layer['x'], layer['y'], color=layer['color'], s=100, label=layer['label'], zorder=4)
+        elif kind == 'line':
+            ax.plot(layer['x'], layer['y'], color=layer['color'], linestyle=MPL_DASH[layer['dash']],
+                    linewidth=2, label=layer['label'])
+        elif kind == 'band':
+            ax.fill_between(layer['x'], layer['lower'], layer['upper'], color=layer['color'], alpha=0.1,
+                            label=layer['label'])
+        elif kind == 'marker':
+            ax.scatter(layer['x'], layer['y'], color=layer['color'], s=200, marker='*', zorder=5,
+                       label=layer['label'])
+        elif kind == 'vline':
+            ax.axvline(x=layer['x'], linestyle=':', color='gray', alpha=0.8)
+            if layer['label']:
+                ax.text(layer['x'] + 0.2, 10, layer['label'], rotation=90, color='#555', fontsize=10)
+
+    ax.set_title(spec['title'], fontsize=14)
+    ax.set_xlabel('Year')
+    ax.set_ylabel(spec['ylabel'])
+    if spec['ylim']:
+        ax.set_ylim(*spec['ylim'])
+    ax.legend(loc='upper left')
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+PLOTLY_FILL = {'blue': 'rgba(31,119,180,0.1)', 'green': 'rgba(0,100,80,0.1)'}
+
+
+def to_plotly(spec):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for layer in spec['layers']:
+        kind = layer['kind']
+        if kind == 'points':
+            fig.add_trace(go.Scatter(x=layer['x'], y=layer['y'], mode='markers', name=layer['label'],
+                                     marker=dict(color=layer['color'], size=10)))
+        elif kind == 'line':
+            fig.add_trace(go.Scatter(x=layer['x'], y=layer['y'], mode='lines', name=layer['label'],
+                                     line=dict(color=layer['color'], width=2, dash=layer['dash'] or 'solid')))
+        elif kind == 'band':
+            fig.add_trace(go.Scatter(
+                x=layer['x'] + layer['x'][::-1], y=layer['upper'] + layer['lower'][::-1],
+                fill='toself', fillcolor=PLOTLY_FILL.get(layer['color'], 'rgba(0,0,0,0.1)'),
+                line=dict(color='rgba(255,255,255,0)'), hoverinfo='skip', name=layer['label']))
+        elif kind == 'marker':
+            fig.add_trace(go.Scatter(x=layer['x'], y=layer['y'], mode='markers', name=layer['label'],
+                                     marker=dict(color=layer['color'], size=18, symbol='star')))
+        elif kind == 'vline':
+            fig.add_vline(x=layer['x'], line_dash='dot', line_color='gray',
+                          annotation_text=layer['label'] or None)
+
+    fig.update_layout(title=spec['title'], xaxis_title='Year', yaxis_title=spec['ylabel'], hovermode='x unified')
+    if spec['ylim']:
+        fig.update_layout(yaxis_range=spec['ylim'])
+    return fig
+
+
+def render_figure(name, spec, out_dir=FIGURE_DIR):
+    """
+    Worker: writes <name>.png and <name>.json. Runs in a separate process.
+    Both are swapped in atomically, so the dashboard never reads a partial file.
+    """
+    import matplotlib.pyplot as plt
+
+    png_path = os.path.join(out_dir, f"{name}.png")
+    fig = to_matplotlib(spec)
+    with fileio.atomic_write(png_path, 'wb') as f:
+        fig.savefig(f, dpi=120, format='png')
+    plt.close(fig)
+
+    with fileio.atomic_write(os.path.join(out_dir, f"{name}.json")) as f:
+        f.write(to_plotly(spec).to_json())
+    return name
+
+
+# --- 3. Figure Store ---
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    with fileio.atomic_write(path) as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def is_current(name, digest, manifest, out_dir=FIGURE_DIR):
+    """A figure is reusable if its input hash matches and both outputs exist."""
+    return (
+        manifest.get(name) == digest
+        and os.path.exists(os.path.join(out_dir, f"{name}.png"))
+        and os.path.exists(os.path.join(out_dir, f"{name}.json"))
+    )
+
+
+def load_figure(name, out_dir=FIGURE_DIR):
+    """Prebuilt Plotly figure as a dict (for st.plotly_chart), or None if not rendered yet."""
+    path = os.path.join(out_dir, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def render_all(df, out_dir=FIGURE_DIR, force=False, max_workers=None):
+    """
+    Builds every spec, then redraws only the figures whose input hash changed.
+    Returns (rendered_names, skipped_names).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    manifest = load_manifest(manifest_path)
+
+    models = forecast.build_models(df)
+    pending, skipped = {}, []
+    for name, builder in FIGURES.items():
+        spec = builder(models, df)
+        digest = spec_hash(spec)
+        if not force and is_current(name, digest, manifest, out_dir):
+            skipped.append(name)
+        else:
+            pending[name] = (spec, digest)
+
+    rendered = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            jobs = {name: pool.submit(render_figure, name, spec, out_dir) for name, (spec, _) in pending.items()}
+            for name, job in jobs.items():
+                job.result()
+                manifest[name] = pending[name][1]
+                rendered.append(name)
+        # Swapped in last: the manifest only ever points at complete figures
+        save_manifest(manifest, manifest_path)
+
+    return rendered, skipped
+
+
+def main():
+    print("--- Starting Figure Rendering ---")
+
+    if not os.path.exists(INPUT_FILE):
+        print("❌ CRITICAL: Modeled data not found. Run impact.py first.")
+        return
+    df = pd.read_csv(INPUT_FILE)
+
+    rendered, skipped = render_all(df)
+    print(f"✅ Success! Rendered {len(rendered)} figures, {len(skipped)} unchanged.")
+    for name in rendered:
+        print(f"   -> {name}")
+    print(f"   Saved to: {FIGURE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
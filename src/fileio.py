@@ -0,0 +1,25 @@
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8'):
+    """
+    Opens `path`.tmp for writing and swaps it over `path` with os.replace once
+    the block finishes, so readers (dashboard, service, other stages) see either
+    the previous file or the complete new one, never a partial write. If the
+    block raises, the temp file is removed and `path` is left untouched.
+
+        with atomic_write(path) as f:
+            df.to_csv(f, index=False)
+    """
+    tmp_path = f"{path}.tmp"
+    binary = 'b' in mode
+    try:
+        with open(tmp_path, mode, encoding=None if binary else encoding, newline=None if binary else '') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,44 @@
+import json
+import os
+
+import pandas as pd
+
+import fileio
+
+
+def row_hashes(df, cols):
+    """Per-row hex hash of the `cols` present in `df`; identical rows share a hash."""
+    cols = [c for c in cols if c in df.columns]
+    return pd.util.hash_pandas_object(df[cols].astype(str), index=False).map(lambda v: format(int(v), 'x'))
+
+
+def row_fingerprints(df, cols):
+    """{hash of a row's `cols`: occurrences}."""
+    return {h: int(n) for h, n in row_hashes(df, cols).value_counts().items()}
+
+
+def unseen_rows(df, seen, cols):
+    """
+    Rows of `df` not covered by the `seen` fingerprints, or None if a previously
+    seen row was removed or edited (the caller must rebuild from scratch).
+    """
+    hashes = row_hashes(df, cols)
+    counts = hashes.value_counts()
+    if any(counts.get(h, 0) < n for h, n in seen.items()):
+        return None
+    # Rows whose fingerprint occurs more often now than before are the new ones
+    occurrence = hashes.groupby(hashes).cumcount() + 1
+    return df[occurrence.to_numpy() > hashes.map(lambda h: seen.get(h, 0)).to_numpy()]
+
+
+def load_seen(path):
+    """Fingerprints saved by the last run, or None if there are none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_seen(seen, path):
+    with fileio.atomic_write(path) as f:
+        json.dump(seen, f, sort_keys=True)
@@ -0,0 +1,161 @@
+import pandas as pd
+import numpy as np
+import os
+
+import coverage
+import fileio
+import simulator
+import timeseries
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeled.csv')
+OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_forecast_final.csv')
+
+TARGET_CODE = 'ACC_OWNERSHIP'
+FORECAST_YEARS = [2025, 2027, 2030]
+ANCHOR_YEAR = 2025
+
+# Model assumptions (see notebook/forecast_v1.ipynb and task_3_modeling_notes.md)
+ADULT_POP = 60.0           # Millions of adults today
+CONVERSION_FACTOR = 0.60   # Share of registered wallets that are "banked"
+OVERLAP_FACTOR = simulator.OVERLAP_FACTOR
+SINGLE_GROWTH = 2.0        # pts/yr after the anchor (Telebirr only)
+DUAL_GROWTH = 2.5          # pts/yr after the anchor (competition effect)
+
+# Fallbacks used when the proxy indicators are missing from the data
+DEFAULT_TELEBIRR_USERS = 54.0
+DEFAULT_MPESA_USERS = 10.0
+
+
+def load_target(index, code=TARGET_CODE):
+    """
+    National observations of the target indicator, one row per year.
+    Gender/location breakdowns are separate series in the index, so they don't distort the trend.
+    """
+    dates, values = index.window(code)
+    target = pd.DataFrame({'year': pd.DatetimeIndex(dates).year, 'value_numeric': values})
+    target = target.groupby('year', as_index=False)['value_numeric'].mean()
+    return target.rename(columns={'value_numeric': 'access_rate'})
+
+
+def latest_value(index, code, default=None):
+    """Most recent national value of an indicator (used for the proxy anchors)."""
+    dates, values = index.window(code)
+    return float(values[-1]) if len(values) else default
+
+
+def trend_forecast(target, years):
+    """
+    MODEL 1: Log-linear trend regression.
+    Returns mean and 95% confidence bounds for every year in `years`.
+    """
+    import statsmodels.api as sm  # Heavy: only paid by callers that fit the trend
+
+    base_year = target['year'].min() - 1
+    X = sm.add_constant(np.log(target['year'] - base_year))
+    model = sm.OLS(target['access_rate'], X).fit()
+
+    X_all = sm.add_constant(np.log(np.asarray(years) - base_year))
+    summary = model.get_prediction(X_all).summary_frame(alpha=0.05)
+
+    return pd.DataFrame({
+        'year': years,
+        'mean': summary['mean'].values,
+        'lower': summary['mean_ci_lower'].values,
+        'upper': summary['mean_ci_upper'].values,
+    }), model.rsquared
+
+
+def implied_rate(digital_users, adult_pop=ADULT_POP, conversion=CONVERSION_FACTOR):
+    """Access rate implied by a wallet base: users / adults * active conversion."""
+    return (digital_users / adult_pop * 100) * conversion
+
+
+def driver_forecast(target, years, anchor, growth):
+    """
+    MODEL 2: External driver path.
+    History as observed, then the proxy anchor in ANCHOR_YEAR growing linearly.
+    """
+    observed = target.set_index('year')['access_rate']
+    path = []
+    for yr in years:
+        if yr <= observed.index.max():
+            path.append(observed.get(yr, np.nan))
+        else:
+            path.append(anchor + (yr - ANCHOR_YEAR) * growth)
+    return np.asarray(path, dtype='float64')
+
+
+def build_models(df, forecast_years=FORECAST_YEARS):
+    """
+    Runs the full ensemble and returns every intermediate series.
+    The figures stage and the final CSV are both built from this.
+    """
+    index = timeseries.SeriesIndex(df)
+    target = load_target(index)
+    years = list(target['year']) + [yr for yr in forecast_years if yr > target['year'].max()]
+
+    # Model 1: Trend
+    trend, r_squared = trend_forecast(target, years)
+
+    # Model 2a: Telebirr only
+    telebirr = latest_value(index, 'USG_TELEBIRR_USERS', DEFAULT_TELEBIRR_USERS)
+    single_anchor = implied_rate(telebirr)
+    single_path = driver_forecast(target, years, single_anchor, SINGLE_GROWTH)
+
+    # Model 2b: Dual engine (Telebirr + unique M-Pesa users)
+    mpesa = latest_value(index, 'USG_MPESA_USERS', DEFAULT_MPESA_USERS)
+    dual_anchor = implied_rate(telebirr + mpesa * (1 - OVERLAP_FACTOR))
+    dual_path = driver_forecast(target, years, dual_anchor, DUAL_GROWTH)
+
+    # Model 3: Scenario synthesis
+    scenarios = pd.DataFrame({
+        'Year': years,
+        'Pessimistic': np.round(trend['lower'].values, 1),
+        'Base_Case': np.round(trend['mean'].values, 1),
+        'Optimistic': np.round(np.minimum(dual_path, 100), 1),
+    })
+
+    return {
+        'target': target,
+        'years': years,
+        'trend': trend,
+        'r_squared': r_squared,
+        'single_anchor': single_anchor,
+        'single_path': single_path,
+        'dual_anchor': dual_anchor,
+        'dual_path': dual_path,
+        'scenarios': scenarios,
+    }
+
+
+def main():
+    print("--- Starting Task 4: Forecasting ---")
+
+    if not os.path.exists(INPUT_FILE):
+        print("❌ CRITICAL: Modeled data not found. Run impact.py first.")
+        return
+    df = pd.read_csv(INPUT_FILE)
+
+    # Data-sufficiency check from the coverage profile (if the stage has run)
+    profile = coverage.load_coverage()
+    if profile is not None:
+        check = coverage.sufficiency(profile, TARGET_CODE)
+        if not check['sufficient']:
+            print(f"⚠️ Warning: only {len(check['years'])} years of {TARGET_CODE} data; the trend fit is weak.")
+        elif check['missing_years']:
+            print(f"   {TARGET_CODE} observed in {check['years']} (no data for {len(check['missing_years'])} years in between)")
+
+    models = build_models(df)
+    with fileio.atomic_write(OUTPUT_FILE) as f:
+        models['scenarios'].to_csv(f, index=False)
+
+    print(f"   Trend R-Squared: {models['r_squared']:.3f}")
+    print(models['scenarios'].tail(3).to_string(index=False))
+    print(f"✅ Success! Saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
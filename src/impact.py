@@ -4,14 +4,23 @@ import os
 import uuid
 from datetime import datetime
 
+import fileio
+import leadlag
+
 # --- Configuration ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_DIR = os.path.dirname(SCRIPT_DIR)
 INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_enriched.csv')
-OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeledv1.csv')
-
-def generate_id(prefix="IMP"):
-    """Generates a unique short ID."""
+OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeled.csv')
+
+def generate_id(prefix="IMP", *parts):
+    """
+    Generates a short ID.
+    With `parts` the ID is derived from them (uuid5), so re-running the stage on
+    the same input produces the same IDs and an unchanged output file.
+    """
+    if parts:
+        return f"{prefix}_{str(uuid.uuid5(uuid.NAMESPACE_URL, '|'.join(map(str, parts))))[:8]}"
     return f"{prefix}_{str(uuid.uuid4())[:8]}"
 
 
@@ -52,7 +61,7 @@ def main():
     # Generate IDs for missing ones
     for idx, row in df[event_mask].iterrows():
         if pd.isna(row['record_id']):
-            df.at[idx, 'record_id'] = f"EVT_{str(uuid.uuid4())[:8]}"
+            df.at[idx, 'record_id'] = generate_id("EVT", row['event_name'], row.get('observation_date'))
 
     # Create strict lookup dictionary: Name -> ID
     event_map = df[event_mask].set_index('event_name')['record_id'].to_dict()
@@ -66,6 +75,9 @@ def main():
 
     impacts = []
 
+    # Empirical lead/lag between indicators (leadlag.py), where strong enough to trust
+    lead_lag = leadlag.load_table()
+
     # --- LOGIC BLOCK A: Telebirr Launch ---
     # Assumption: Disruptive Product Launch -> High Impact on Usage, Medium on Access
     evt_name = 'Telebirr Launch'
@@ -74,7 +86,7 @@ def main():
 
         # Link 1: Usage (Direct Effect)
         impacts.append({
-            'record_id': generate_id(),
+            'record_id': generate_id("IMP", evt_id, 'USG_TELEBIRR_USERS'),
             'record_type': 'impact_link',
             'parent_id': evt_id,
             'pillar': 'USAGE',
@@ -90,8 +102,10 @@ def main():
         })
 
         # Link 2: Access (Indirect/Enabling Effect)
+        # The lag is how long wallet adoption takes to show up in account ownership
+        lag, corr = leadlag.suggest_lag(lead_lag, 'USG_TELEBIRR_USERS', 'ACC_OWNERSHIP', default=12)
         impacts.append({
-            'record_id': generate_id(),
+            'record_id': generate_id("IMP", evt_id, 'ACC_OWNERSHIP'),
             'record_type': 'impact_link',
             'parent_id': evt_id,
             'pillar': 'ACCESS',
@@ -100,11 +114,12 @@ def main():
             'impact_direction': 'increase',
             'impact_magnitude': 'Medium',  # Lower than usage because of "OTC" behavior
             'impact_estimate': np.nan,
-            'lag_months': 12,  # Lagged effect on formal account ownership
-            'evidence_basis': 'literature',
+            'lag_months': lag,  # Lagged effect on formal account ownership
+            'evidence_basis': 'literature' if corr is None else 'empirical',
             'comparable_country': 'Kenya',  # M-Pesa trajectory
             'confidence': 'Medium',
             'notes': 'Over-the-counter (OTC) usage often precedes account registration.'
+                     + ('' if corr is None else f" Lag from Telebirr users -> ownership cross-correlation (r={corr:.2f}).")
         })
 
     # --- LOGIC BLOCK B: Mandatory Fuel Payment ---
@@ -114,7 +129,7 @@ def main():
         evt_id = event_map[evt_name]
 
         impacts.append({
-            'record_id': generate_id(),
+            'record_id': generate_id("IMP", evt_id, 'USG_DIGITAL_TRANSACTIONS'),
             'record_type': 'impact_link',
             'parent_id': evt_id,
             'pillar': 'USAGE',
@@ -136,7 +151,7 @@ def main():
         evt_id = event_map[evt_name]
 
         impacts.append({
-            'record_id': generate_id(),
+            'record_id': generate_id("IMP", evt_id, 'USG_MPESA_USERS'),
             'record_type': 'impact_link',
             'parent_id': evt_id,
             'pillar': 'USAGE',
@@ -167,7 +182,8 @@ def main():
         df_final = pd.concat([df, df_impacts], ignore_index=True)
 
         # Save
-        df_final.to_csv(OUTPUT_FILE, index=False)
+        with fileio.atomic_write(OUTPUT_FILE) as f:
+            df_final.to_csv(f, index=False)
         print(f"✅ Success! Added {len(impacts)} Impact Links.")
         print(f"   Saved to: {OUTPUT_FILE}")
     else:
@@ -0,0 +1,211 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import copy
+from datetime import datetime
+
+import fileio
+import fingerprints
+import timeseries
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+MODELED_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeled.csv')
+FORECAST_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_forecast_final.csv')
+KPI_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'kpis.json')
+# Fingerprints of the modeled rows already folded in; kept out of kpis.json so readers stay O(1)
+ROWS_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'kpis_rows.json')
+
+# Indicators the Executive Summary is built from
+ACCESS_CODE = 'ACC_OWNERSHIP'
+WALLET_CODES = ['USG_TELEBIRR_USERS', 'USG_MPESA_USERS']
+DIGITAL_CODE = 'USG_TELEBIRR_USERS'
+CROSSOVER_CODE = 'USG_CROSSOVER'
+P2P_CODE = 'USG_P2P_COUNT'
+ATM_CODE = 'USG_ATM_COUNT'
+TRACKED_CODES = [ACCESS_CODE, CROSSOVER_CODE, P2P_CODE, ATM_CODE] + WALLET_CODES
+
+SCENARIOS = ['Pessimistic', 'Base_Case', 'Optimistic']
+# Row fingerprints cover the value as well, so a revised value forces a rebuild
+FINGERPRINT_COLS = ['record_type', 'indicator_code', 'observation_date', 'gender', 'location', 'value_numeric']
+
+
+def _national_points(index):
+    """(code, 'YYYY-MM-DD', value) for the tracked indicators' national series, date order per code."""
+    for code in TRACKED_CODES:
+        dates, values = index.window(code)
+        for date, value in zip(pd.DatetimeIndex(dates).strftime('%Y-%m-%d'), values):
+            yield code, date, float(value)
+
+
+def update_series_state(state, new_rows):
+    """
+    Folds new observations into the per-indicator endpoints the KPIs need:
+    first, previous and latest (date, value). Cost is O(new rows).
+    A row dated on the current latest date is treated as a revision of it.
+    """
+    index = timeseries.SeriesIndex(new_rows)
+    for code, date, value in _national_points(index):
+        point = [date, value]
+        entry = state.setdefault(code, {'first': point, 'prev': None, 'last': point})
+
+        if date < entry['first'][0]:
+            entry['first'] = point
+        if date > entry['last'][0]:
+            entry['prev'], entry['last'] = entry['last'], point
+        elif date == entry['last'][0]:
+            entry['last'] = point
+        elif entry['prev'] is None or date >= entry['prev'][0]:
+            entry['prev'] = point
+    return state
+
+
+def _latest(state, code):
+    entry = state.get(code)
+    return entry['last'][1] if entry else None
+
+
+def derive_kpis(state, df_forecast=None):
+    """Turns the series endpoints (plus forecast endpoints) into display-ready KPIs."""
+    kpis = {}
+
+    # 1. Latest official access
+    access = state.get(ACCESS_CODE)
+    if access:
+        kpis['access_latest'] = access['last'][1]
+        kpis['access_year'] = int(access['last'][0][:4])
+        if access['prev']:
+            kpis['access_delta'] = round(access['last'][1] - access['prev'][1], 2)
+            kpis['access_prev_year'] = int(access['prev'][0][:4])
+
+    # 2. Wallet totals (registered users, millions)
+    for code in WALLET_CODES:
+        kpis[f"{code.lower()}_latest"] = _latest(state, code)
+    wallets = [_latest(state, code) for code in WALLET_CODES if _latest(state, code) is not None]
+    kpis['wallet_total'] = round(sum(wallets), 2) if wallets else None
+
+    # 3. P2P/ATM crossover: reported ratio if present, otherwise derived from counts
+    ratio = _latest(state, CROSSOVER_CODE)
+    p2p, atm = _latest(state, P2P_CODE), _latest(state, ATM_CODE)
+    if ratio is None and p2p is not None and atm:
+        ratio = p2p / atm
+    kpis['p2p_atm_ratio'] = round(ratio, 2) if ratio is not None else None
+
+    # 4. Digital CAGR between first and latest observation
+    digital = state.get(DIGITAL_CODE)
+    kpis['digital_cagr'] = None
+    if digital and digital['first'][1] > 0:
+        years = (pd.Timestamp(digital['last'][0]) - pd.Timestamp(digital['first'][0])).days / 365.25
+        if years > 0:
+            cagr = (digital['last'][1] / digital['first'][1]) ** (1 / years) - 1
+            kpis['digital_cagr'] = round(cagr * 100, 1)
+
+    # 5. Scenario endpoints at the forecast horizon
+    if df_forecast is not None and not df_forecast.empty:
+        horizon = df_forecast.loc[df_forecast['Year'].idxmax()]
+        kpis['forecast_year'] = int(horizon['Year'])
+        for scenario in SCENARIOS:
+            if scenario in df_forecast.columns:
+                kpis[f"forecast_{scenario.lower()}"] = float(horizon[scenario])
+
+    # JSON has no NaN: normalize numpy scalars and missing values to plain types
+    return {k: (None if v is None or (isinstance(v, float) and np.isnan(v)) else v) for k, v in kpis.items()}
+
+
+def _forecast_kpis(kpis):
+    return {k: v for k, v in kpis.items() if k.startswith('forecast_')}
+
+
+def compute_kpis(df_modeled, df_forecast=None):
+    """Full rebuild: builds the artifact from the whole modeled dataset."""
+    state = update_series_state({}, df_modeled)
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'kpis': derive_kpis(state, df_forecast),
+        'series': state,
+    }
+
+
+def update_kpis(artifact, new_rows, df_forecast=None):
+    """
+    Incremental refresh: folds only `new_rows` into an existing artifact.
+    Without a forecast, the previous scenario KPIs are carried over.
+    """
+    state = update_series_state(copy.deepcopy(artifact.get('series', {})), new_rows)
+    kpis = derive_kpis(state, df_forecast)
+    if df_forecast is None:
+        kpis.update(_forecast_kpis(artifact.get('kpis', {})))
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'kpis': kpis,
+        'series': state,
+    }
+
+
+def refresh_kpis(df_modeled, artifact=None, seen=None, df_forecast=None):
+    """
+    Brings `artifact` in line with `df_modeled`, folding in only the rows the
+    last run has not seen. Removed or edited rows force a full rebuild.
+    Returns (artifact, fingerprints, number of rows folded in).
+    """
+    current = fingerprints.row_fingerprints(df_modeled, FINGERPRINT_COLS)
+    new_rows = fingerprints.unseen_rows(df_modeled, seen, FINGERPRINT_COLS) \
+        if artifact is not None and seen is not None else None
+    if new_rows is None:
+        rebuilt = compute_kpis(df_modeled, df_forecast)
+        if df_forecast is None and artifact:
+            rebuilt['kpis'].update(_forecast_kpis(artifact.get('kpis', {})))
+        return rebuilt, current, len(df_modeled)
+    return update_kpis(artifact, new_rows, df_forecast), current, len(new_rows)
+
+
+def save_kpis(artifact, path=KPI_FILE, seen=None, rows_path=ROWS_FILE):
+    """
+    Swaps the artifact in atomically. The row fingerprints go last: they must
+    never claim rows the artifact doesn't hold.
+    """
+    with fileio.atomic_write(path) as f:
+        json.dump(artifact, f, indent=2)
+    if seen is not None:
+        fingerprints.save_seen(seen, rows_path)
+
+
+def load_artifact(path=KPI_FILE):
+    """Returns the full artifact (KPIs and series state), or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_kpis(path=KPI_FILE):
+    """Returns the flat KPI dict, or None if the artifact has not been built yet."""
+    artifact = load_artifact(path)
+    return artifact['kpis'] if artifact else None
+
+
+def main():
+    print("--- Starting KPI Materialization ---")
+
+    if not os.path.exists(MODELED_FILE):
+        print("❌ CRITICAL: Modeled data not found. Run impact.py first.")
+        return
+    df_modeled = pd.read_csv(MODELED_FILE)
+
+    df_forecast = None
+    if os.path.exists(FORECAST_FILE):
+        df_forecast = pd.read_csv(FORECAST_FILE)
+    else:
+        print("⚠️ Warning: Forecast file not found. Keeping the previous scenario KPIs, if any.")
+
+    artifact, seen, folded = refresh_kpis(df_modeled, load_artifact(), fingerprints.load_seen(ROWS_FILE), df_forecast)
+    save_kpis(artifact, seen=seen)
+
+    print(f"✅ Success! Materialized {len(artifact['kpis'])} KPIs ({folded} of {len(df_modeled)} rows folded in).")
+    print(f"   Saved to: {KPI_FILE}")
+
+
+if __name__ == "__main__":
+    main()
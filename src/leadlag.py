@@ -0,0 +1,207 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import fileio
+import timeseries
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+# Observations are unchanged by impact.py, so the table is computed upstream of it
+INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_enriched.csv')
+OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_lead_lag.csv')
+
+MAX_LAG_MONTHS = 36       # Lags searched in both directions
+MIN_OVERLAP = 4           # Months where both series are observed at a given lag
+BLOCK_ELEMENTS = 4_000_000  # Complex spectra per batch (~64 MB); bounds memory for large indicator sets
+
+
+# --- 1. Monthly Grid ---
+
+def monthly_grid(index):
+    """
+    National series on a regular monthly grid.
+    Returns (codes, values, mask): values is (n_series, n_months) standardized on the
+    observed months, mask is 1.0 where the month has at least one observation.
+    Observations within a month are averaged.
+    """
+    codes = [key for key in index.offsets if '|' not in key]
+    if not codes:
+        return [], np.zeros((0, 0)), np.zeros((0, 0))
+
+    spans = [index.offsets[c] for c in codes]
+    series_id = np.concatenate([np.full(hi - lo, i) for i, (lo, hi) in enumerate(spans)])
+    dates = np.concatenate([index.dates[lo:hi] for lo, hi in spans]).astype('datetime64[M]').astype('int64')
+    values = np.concatenate([index.values[lo:hi] for lo, hi in spans])
+
+    months = dates - dates.min()
+    n_months = int(months.max()) + 1
+    flat = series_id * n_months + months
+    size = len(codes) * n_months
+    counts = np.bincount(flat, minlength=size).reshape(len(codes), n_months)
+    sums = np.bincount(flat, weights=values, minlength=size).reshape(len(codes), n_months)
+
+    mask = (counts > 0).astype('float64')
+    grid = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    # Standardize on observed months; constant or near-empty series carry no signal
+    n_obs = mask.sum(axis=1)
+    mean = (grid * mask).sum(axis=1) / np.maximum(n_obs, 1)
+    std = np.sqrt((((grid - mean[:, None]) * mask) ** 2).sum(axis=1) / np.maximum(n_obs, 1))
+    keep = (n_obs >= MIN_OVERLAP) & (std > 0)
+    grid = (grid - mean[:, None]) / np.where(std > 0, std, 1)[:, None] * mask
+
+    return [c for c, k in zip(codes, keep) if k], grid[keep], mask[keep]
+
+
+# --- 2. Masked Cross-Correlation ---
+
+def _fast_len(n):
+    """Smallest length >= n with only 2, 3, 5 as factors (fast FFT sizes)."""
+    best = 1 << int(np.ceil(np.log2(max(n, 1))))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            size = p35
+            while size < n:
+                size *= 2
+            best = min(best, size)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def lagged_correlations(values, mask, max_lag=MAX_LAG_MONTHS, min_overlap=MIN_OVERLAP):
+    """
+    Pearson correlation of series i at month t with series j at month t + lag,
+    for every pair i < j and every lag in [-max_lag, max_lag], using only months
+    where both are observed.
+
+    The six masked sums that make up each correlation (n, Σx, Σy, Σx², Σy², Σxy)
+    are all cross-correlations, so each is one product of precomputed spectra per
+    pair. Rows are processed in blocks so memory stays bounded; yields
+    (lags, i, j, corr, overlap) per block with corr/overlap shaped (n_pairs, n_lags).
+    """
+    n_series, n_months = values.shape
+    max_lag = min(max_lag, max(n_months - 1, 0))
+    lags = np.arange(-max_lag, max_lag + 1)
+    if n_series < 2:
+        return
+
+    # Zero padding to at least n_months + max_lag keeps the circular correlation exact
+    fft_len = _fast_len(n_months + max_lag)
+    spec_m = np.fft.rfft(mask, fft_len)
+    spec_x = np.fft.rfft(values, fft_len)
+    spec_xx = np.fft.rfft(values ** 2, fft_len)
+
+    def xcorr(a, b):
+        # sum_t a[t] * b[t + lag], for every (row of a, row of b)
+        full = np.fft.irfft(np.conj(a)[:, None, :] * b[None, :, :], fft_len)
+        return np.concatenate([full[..., fft_len - max_lag:], full[..., :max_lag + 1]], axis=-1)
+
+    block = max(1, BLOCK_ELEMENTS // (n_series * spec_m.shape[1]))
+    for start in range(0, n_series - 1, block):
+        rows = slice(start, min(start + block, n_series))
+        cols = slice(start, n_series)
+        n = np.rint(xcorr(spec_m[rows], spec_m[cols]))
+        sx = xcorr(spec_x[rows], spec_m[cols])
+        sy = xcorr(spec_m[rows], spec_x[cols])
+        sxx = xcorr(spec_xx[rows], spec_m[cols])
+        syy = xcorr(spec_m[rows], spec_xx[cols])
+        sxy = xcorr(spec_x[rows], spec_x[cols])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * sxy - sx * sy
+            var = (n * sxx - sx ** 2) * (n * syy - sy ** 2)
+            r = np.where((n >= min_overlap) & (var > 1e-9), cov / np.sqrt(np.abs(var)), np.nan)
+
+        # Upper-triangle pairs of this block (global j > i)
+        bi, bj = np.triu_indices(rows.stop - rows.start, k=1, m=n_series - start)
+        yield lags, bi + start, bj + start, np.clip(r[bi, bj], -1, 1), n[bi, bj].astype(int)
+
+
+def best_lags(values, mask, max_lag=MAX_LAG_MONTHS, min_overlap=MIN_OVERLAP):
+    """
+    Strongest lag per pair, reduced block by block so only one row per pair is kept.
+    Returns (i, j, lag, corr, overlap) arrays; pairs with no usable lag are dropped.
+    """
+    parts = []
+    for lags, pair_i, pair_j, corr, overlap in lagged_correlations(values, mask, max_lag, min_overlap):
+        usable = ~np.isnan(corr).all(axis=1)
+        corr, overlap = corr[usable], overlap[usable]
+        # On ties the shortest lag wins
+        order = np.argsort(np.abs(lags), kind='stable')
+        best = order[np.nanargmax(np.abs(corr[:, order]), axis=1)] if len(corr) else np.zeros(0, dtype=int)
+        rows = np.arange(len(best))
+        parts.append((pair_i[usable], pair_j[usable], lags[best], corr[rows, best], overlap[rows, best]))
+
+    if not parts:
+        return tuple(np.zeros(0, dtype=dt) for dt in (int, int, int, float, int))
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+# --- 3. Lead/Lag Table ---
+
+def lead_lag_table(df, max_lag=MAX_LAG_MONTHS, min_overlap=MIN_OVERLAP):
+    """
+    Best lag per indicator pair, ranked by |correlation|.
+    A positive `lag_months` means `leader` moves first and `follower` follows that many months later.
+    """
+    codes, values, mask = monthly_grid(timeseries.SeriesIndex(df))
+    pair_i, pair_j, lag, corr, overlap = best_lags(values, mask, max_lag, min_overlap)
+
+    # Negative lag: j moves first
+    codes = np.asarray(codes, dtype=object)
+    table = pd.DataFrame({
+        'leader': np.where(lag >= 0, codes[pair_i], codes[pair_j]) if len(lag) else [],
+        'follower': np.where(lag >= 0, codes[pair_j], codes[pair_i]) if len(lag) else [],
+        'lag_months': np.abs(lag),
+        'correlation': corr.round(4),
+        'overlap_months': overlap,
+    })
+    table = table.reindex(table['correlation'].abs().sort_values(ascending=False, kind='stable').index)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+
+def load_table(path=OUTPUT_FILE):
+    return pd.read_csv(path) if os.path.exists(path) else None
+
+
+def suggest_lag(table, leader, follower, default, min_corr=0.5):
+    """
+    lag_months for a leader -> follower channel from the lead/lag table.
+    Returns (lag, correlation), or (default, None) when the table has no
+    sufficiently strong entry in that direction.
+    """
+    if table is None or table.empty:
+        return default, None
+    match = table[(table['leader'] == leader) & (table['follower'] == follower)]
+    if match.empty or abs(match['correlation'].iloc[0]) < min_corr:
+        return default, None
+    return int(match['lag_months'].iloc[0]), float(match['correlation'].iloc[0])
+
+
+def main():
+    print("--- Computing Lead/Lag Cross-Correlations ---")
+
+    if not os.path.exists(INPUT_FILE):
+        print("❌ CRITICAL: Enriched data not found. Run Data_enrich.py first.")
+        sys.exit(1)
+    df = pd.read_csv(INPUT_FILE)
+
+    table = lead_lag_table(df)
+    with fileio.atomic_write(OUTPUT_FILE) as f:
+        table.to_csv(f, index=False)
+    print(f"✅ Success! Ranked {len(table)} indicator pairs (lags up to ±{MAX_LAG_MONTHS} months).")
+    for _, row in table.head(5).iterrows():
+        print(f"   {row['leader']} -> {row['follower']}: {row['lag_months']} months, r={row['correlation']:+.2f}")
+    print(f"   Saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import asyncio
+import random
+import sys
+import time
+
+# --- Configuration ---
+HOST = '127.0.0.1'
+PORT = 8765
+CONNECTIONS = 32          # Concurrent keep-alive clients
+REQUESTS = 5000           # Total requests across all clients
+
+# A realistic mix: mostly repeated dashboard-style queries, some fresh simulator levers
+QUERY_MIX = [
+    (0.35, lambda: "/forecast"),
+    (0.15, lambda: "/forecast?years=2025,2027,2030"),
+    (0.15, lambda: "/kpis"),
+    (0.15, lambda: "/series?indicator=ACC_OWNERSHIP"),
+    (0.20, lambda: f"/simulate?telebirr={random.randrange(55, 100, 5)}&mpesa={random.randrange(5, 26)}"
+                   f"&active_rate={random.randrange(30, 85, 5)}&fuel_compliance={random.randrange(50, 105, 5)}"),
+]
+
+
+def pick_path():
+    r, acc = random.random(), 0.0
+    for weight, build in QUERY_MIX:
+        acc += weight
+        if r <= acc:
+            return build()
+    return QUERY_MIX[-1][1]()
+
+
+async def client(host, port, n_requests, latencies, errors):
+    """One keep-alive connection issuing requests back to back."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            path = pick_path()
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            length = next(int(ln.split(':', 1)[1]) for ln in lines if ln.lower().startswith('content-length'))
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+
+            status = int(lines[0].split(' ')[1])
+            if status != 200:
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float('nan')
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+async def run(host=HOST, port=PORT, connections=CONNECTIONS, requests=REQUESTS):
+    latencies, errors = [], {}
+    # Spread the remainder so exactly `requests` are sent; idle connections are not opened
+    counts = [requests // connections + (i < requests % connections) for i in range(connections)]
+    counts = [n for n in counts if n > 0]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, n, latencies, errors) for n in counts))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"   Requests:   {len(latencies)} over {len(counts)} connections in {elapsed:.2f}s")
+    print(f"   Throughput: {len(latencies) / elapsed:.0f} req/s")
+    print("   Latency:    " + "  ".join(
+        f"p{p}={percentile(latencies, p) * 1000:.1f}ms" for p in (50, 90, 99, 99.9)
+    ) + f"  max={latencies[-1] * 1000:.1f}ms")
+    if errors:
+        print(f"⚠️ Non-200 responses: {errors}")
+    return latencies, errors
+
+
+def main():
+    print("--- Load Testing Forecast Service ---")
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else CONNECTIONS
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else REQUESTS
+    print(f"   Target: http://{HOST}:{port}  (start it with: python src/service.py {port})")
+
+    try:
+        asyncio.run(run(port=port, connections=connections, requests=requests))
+    except ConnectionRefusedError:
+        print("❌ CRITICAL: Service is not running.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
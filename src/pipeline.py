@@ -0,0 +1,295 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import importlib
+
+import fileio
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+STATE_FILE = os.path.join(BASE_DIR, 'data', 'processed', '.pipeline_state.json')
+
+RAW = os.path.join('data', 'raw')
+PROCESSED = os.path.join('data', 'processed')
+FIGURES = os.path.join('data', 'figures')
+SNAPSHOTS = os.path.join('data', 'snapshots')
+
+HASH_CHUNK = 1024 * 1024
+
+
+class Stage:
+    """
+    One step of the pipeline.
+    `inputs` and `outputs` are paths (or globs) relative to the project root;
+    dependencies between stages are inferred from them.
+    The stage runs `module.func()` in a worker process.
+    `uses` lists the other project modules it imports: their code is part of the
+    stage's fingerprint, so editing e.g. forecast.py also re-renders the figures.
+    """
+
+    def __init__(self, name, module, inputs, outputs, func='main', uses=()):
+        self.name = name
+        self.module = module
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+        self.uses = list(uses)
+
+    @property
+    def sources(self):
+        return [os.path.join(SCRIPT_DIR, f"{m}.py") for m in [self.module] + self.uses]
+
+
+# enrich -> (coverage, leadlag) ; leadlag -> impact -> (forecast, figures, series_store) ; forecast -> (kpis, snapshot)
+STAGES = [
+    Stage('enrich', 'Data_enrich', uses=['fileio'],
+          inputs=[os.path.join(RAW, '*')],  # Primary unified file plus supplementary drops
+          outputs=[os.path.join(PROCESSED, 'ethiopia_fi_enriched.csv')]),
+    Stage('coverage', 'coverage', uses=['exports', 'fileio', 'fingerprints', 'timeseries'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_enriched.csv')],
+          outputs=[os.path.join(PROCESSED, 'coverage.csv.gz')]),
+    Stage('leadlag', 'leadlag', uses=['fileio', 'timeseries'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_enriched.csv')],
+          outputs=[os.path.join(PROCESSED, 'ethiopia_fi_lead_lag.csv')]),
+    Stage('impact', 'impact', uses=['fileio', 'leadlag', 'timeseries'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_enriched.csv'),
+                  os.path.join(PROCESSED, 'ethiopia_fi_lead_lag.csv')],
+          outputs=[os.path.join(PROCESSED, 'ethiopia_fi_modeled.csv')]),
+    Stage('forecast', 'forecast', uses=['coverage', 'simulator', 'exports', 'fileio', 'fingerprints', 'timeseries'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_modeled.csv'),
+                  os.path.join(PROCESSED, 'coverage.csv.gz')],
+          outputs=[os.path.join(PROCESSED, 'ethiopia_fi_forecast_final.csv')]),
+    Stage('figures', 'figures',
+          uses=['forecast', 'coverage', 'simulator', 'exports', 'fileio', 'fingerprints', 'timeseries'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_modeled.csv')],
+          outputs=[os.path.join(FIGURES, 'manifest.json')]),
+    Stage('kpis', 'kpis', uses=['fileio', 'fingerprints', 'timeseries'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_modeled.csv'),
+                  os.path.join(PROCESSED, 'ethiopia_fi_forecast_final.csv')],
+          outputs=[os.path.join(PROCESSED, 'kpis.json')]),
+    Stage('series_store', 'timeseries', uses=['fileio'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_modeled.csv')],
+          outputs=[os.path.join(PROCESSED, 'series_store', 'index.json')]),
+    Stage('snapshot', 'snapshots', uses=['fileio'],
+          inputs=[os.path.join(PROCESSED, 'ethiopia_fi_enriched.csv'),
+                  os.path.join(PROCESSED, 'ethiopia_fi_modeled.csv'),
+                  os.path.join(PROCESSED, 'ethiopia_fi_forecast_final.csv')],
+          outputs=[os.path.join(SNAPSHOTS, 'index.json')]),
+]
+
+
+# --- 1. Content Hashing ---
+
+def _abs(path):
+    return path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+
+
+def expand(patterns):
+    """Resolves globs to a sorted list of existing files (relative to the project root)."""
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(_abs(pattern))
+        files.update(os.path.relpath(m, BASE_DIR) for m in matches if os.path.isfile(m))
+    return sorted(files)
+
+
+def file_hash(path, cache):
+    """
+    sha256 of a file's content. `cache` maps path -> [size, mtime_ns, digest]
+    so files whose stat is unchanged are not re-read.
+    """
+    stat = os.stat(_abs(path))
+    cached = cache.get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(_abs(path), 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return cache[path][2]
+
+
+def fingerprint(stage, hash_cache):
+    """Hash of the stage's code (its module and the modules it uses) plus the content of every input file."""
+    digest = hashlib.sha256()
+    for source in stage.sources:
+        path = os.path.relpath(source, BASE_DIR)
+        digest.update(f"{path}:{file_hash(path, hash_cache)}".encode('utf-8'))
+    for path in expand(stage.inputs):
+        digest.update(f"{path}:{file_hash(path, hash_cache)}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+# --- 2. State ---
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {'stages': {}, 'hashes': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with fileio.atomic_write(path) as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+# --- 3. Scheduling ---
+
+def dependencies(stages):
+    """stage name -> names of the stages producing any of its inputs."""
+    producers = {}
+    for stage in stages:
+        for out in stage.outputs:
+            producers[os.path.normpath(out)] = stage.name
+    return {
+        stage.name: {producers[os.path.normpath(i)] for i in stage.inputs if os.path.normpath(i) in producers}
+        for stage in stages
+    }
+
+
+def _run_stage(module, func):
+    """Worker entry point. Stage scripts may sys.exit() on errors; surface that as a failure."""
+    sys.path.insert(0, SCRIPT_DIR)
+    try:
+        getattr(importlib.import_module(module), func)()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{module}.{func}() exited with status {e.code}")
+
+
+def run(stages=STAGES, targets=None, force=False, max_workers=None):
+    """
+    Runs the DAG. A stage is skipped when its fingerprint matches the last
+    successful run and its outputs still exist. Independent ready stages run
+    concurrently. Returns {stage name: 'ran' | 'skipped' | 'failed' | 'blocked'}.
+    """
+    deps = dependencies(stages)
+    by_name = {s.name: s for s in stages}
+
+    # Restrict to the requested targets and everything upstream of them
+    if targets:
+        wanted, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in wanted:
+                wanted.add(name)
+                stack.extend(deps[name])
+        stages = [s for s in stages if s.name in wanted]
+
+    selected = {s.name for s in stages}
+    state = load_state()
+    hash_cache = state.setdefault('hashes', {})
+    results, running, pending = {}, {}, [s.name for s in stages]
+    pool = None  # Created on first submit, so fully cached runs never pay for it
+
+    try:
+        while pending or running:
+            for name in list(pending):
+                upstream = [results.get(d) for d in deps[name] if d in selected]
+                if any(r is None for r in upstream):
+                    continue  # Still waiting on a producer
+                pending.remove(name)
+                stage = by_name[name]
+
+                if any(r in ('failed', 'blocked') for r in upstream):
+                    results[name] = 'blocked'
+                    print(f"⏭️  {name}: blocked by upstream failure")
+                    continue
+
+                digest = fingerprint(stage, hash_cache)
+                outputs_exist = all(os.path.exists(_abs(o)) for o in stage.outputs)
+                if not force and outputs_exist and state['stages'].get(name) == digest:
+                    results[name] = 'skipped'
+                    print(f"✅ {name}: up to date")
+                    continue
+
+                if pool is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    pool = ProcessPoolExecutor(max_workers=max_workers)
+                print(f"🚀 {name}: running")
+                running[pool.submit(_run_stage, stage.module, stage.func)] = (name, digest, time.perf_counter())
+
+            if not running:
+                continue
+            from concurrent.futures import wait, FIRST_COMPLETED
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, digest, started = running.pop(future)
+                stage = by_name[name]
+                error = future.exception()
+                if error is None and not all(os.path.exists(_abs(o)) for o in stage.outputs):
+                    error = RuntimeError(f"expected outputs missing: {stage.outputs}")
+
+                if error is None:
+                    results[name] = 'ran'
+                    state['stages'][name] = digest
+                    print(f"✅ {name}: done in {time.perf_counter() - started:.1f}s")
+                else:
+                    results[name] = 'failed'
+                    state['stages'].pop(name, None)
+                    print(f"❌ {name}: {error}")
+            save_state(state)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    save_state(state)
+    return results
+
+
+def status(stages=STAGES):
+    """
+    Reports, without running anything, whether each stage is up to date.
+    Returns {stage name: 'up to date' | 'stale' | 'stale (upstream)' | 'missing outputs' | 'never run'}.
+    """
+    deps = dependencies(stages)
+    state = load_state()
+    hash_cache = state.setdefault('hashes', {})
+    report = {}
+
+    for stage in stages:  # STAGES is declared in dependency order
+        if stage.name not in state['stages']:
+            report[stage.name] = 'never run'
+        elif not all(os.path.exists(_abs(o)) for o in stage.outputs):
+            report[stage.name] = 'missing outputs'
+        elif any(report.get(d) != 'up to date' for d in deps[stage.name]):
+            report[stage.name] = 'stale (upstream)'
+        elif fingerprint(stage, hash_cache) != state['stages'][stage.name]:
+            report[stage.name] = 'stale'
+        else:
+            report[stage.name] = 'up to date'
+    return report
+
+
+def main():
+    print("--- Starting Pipeline ---")
+    args = sys.argv[1:]
+    force = '--force' in args
+    targets = [a for a in args if not a.startswith('--')] or None
+
+    unknown = set(targets or []) - {s.name for s in STAGES}
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(sorted(unknown))}. Available: {', '.join(s.name for s in STAGES)}")
+        sys.exit(1)
+
+    results = run(targets=targets, force=force)
+    ran = [n for n, r in results.items() if r == 'ran']
+    failed = [n for n, r in results.items() if r in ('failed', 'blocked')]
+
+    print("\n" + "=" * 50)
+    print(f"   Ran: {len(ran)}  Skipped: {list(results.values()).count('skipped')}  Failed: {len(failed)}")
+    print("=" * 50)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
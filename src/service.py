@@ -0,0 +1,273 @@
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+import numpy as np
+import pandas as pd
+
+import exports
+import forecast
+import kpis
+import simulator
+import timeseries
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeled.csv')
+
+HOST = '127.0.0.1'
+PORT = 8765
+CACHE_SIZE = 256          # Computed forecasts / simulator results kept in memory
+WORKERS = 4               # Threads for CPU-bound model fits
+MAX_HEADER_BYTES = 16 * 1024
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error',
+               503: 'Service Unavailable'}
+
+
+class QueryError(Exception):
+    """Bad request parameters; reported to the client as a 400."""
+
+
+class LRUCache:
+    """Small ordered-dict LRU. Only touched from the event loop, so no locking."""
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ForecastService:
+    """
+    Query layer over the modeled data and forecasting code.
+    Identical concurrent queries share one in-flight computation (coalescing),
+    and finished results live in an LRU keyed by (data version, query).
+    """
+
+    def __init__(self, data_path=INPUT_FILE, cache_size=CACHE_SIZE, workers=WORKERS):
+        self.data_path = data_path
+        self.cache = LRUCache(cache_size)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.in_flight = {}
+        self.coalesced = 0
+        # (version, df, index), swapped as one tuple so a reader never mixes generations
+        self.data = (None, None, None)
+        self._reload_lock = asyncio.Lock()
+
+    # --- Data ---
+    def _load(self):
+        if not os.path.exists(self.data_path):
+            raise FileNotFoundError(self.data_path)
+        df = pd.read_csv(self.data_path)
+        return df, timeseries.load_index(df, source=self.data_path)
+
+    async def refresh(self):
+        """
+        Reloads the dataset when the file on disk changed. The check is a stat call;
+        the reload itself runs in the pool and concurrent requests wait on one lock.
+        Returns the current (version, df, index).
+        """
+        version = exports.data_version(self.data_path)
+        if version != self.data[0]:
+            async with self._reload_lock:
+                if version != self.data[0]:
+                    loop = asyncio.get_running_loop()
+                    df, index = await loop.run_in_executor(self.executor, self._load)
+                    self.data = (version, df, index)
+        return self.data
+
+    # --- Handlers (run in the worker pool) ---
+    def _forecast(self, df, years):
+        models = forecast.build_models(df, forecast_years=list(years) if years else forecast.FORECAST_YEARS)
+        return {
+            'indicator': forecast.TARGET_CODE,
+            'r_squared': round(float(models['r_squared']), 4),
+            'scenarios': models['scenarios'].to_dict(orient='records'),
+        }
+
+    def _series(self, index, code, start, end, segment):
+        dates, values = index.window(code, start, end, segment=segment)
+        return {
+            'indicator': code,
+            'segment': segment,
+            'dates': [str(d)[:10] for d in dates],
+            'values': values.tolist(),
+        }
+
+    def _kpis(self, df):
+        loaded = kpis.load_kpis()
+        return loaded if loaded is not None else kpis.compute_kpis(df)['kpis']
+
+    # --- Query routing ---
+    def parse(self, path, params, data):
+        """
+        Maps a request to (cache key, callable). The callable is bound to `data`,
+        the (version, df, index) the key is built for. Raises QueryError on bad input.
+        """
+        version, df, index = data
+        try:
+            if path == '/forecast':
+                years = tuple(sorted(int(y) for y in params.get('years', '').split(',') if y))
+                return (version, 'forecast', years), lambda: self._forecast(df, years)
+
+            if path == '/simulate':
+                levers = (
+                    float(params.get('telebirr', 75)), float(params.get('mpesa', 15)),
+                    float(params.get('active_rate', 60)), float(params.get('fuel_compliance', 80)),
+                )
+                return (version, 'simulate', levers), lambda: simulator.simulate_inclusion(*levers)
+
+            if path == '/series':
+                if 'indicator' not in params:
+                    raise QueryError("'indicator' is required")
+                query = (params['indicator'], params.get('start'), params.get('end'), params.get('segment', ''))
+                # Bad dates fail here as a 400, not later inside window()
+                for bound in query[1:3]:
+                    if bound is not None:
+                        np.datetime64(bound, 'ns')
+                return (version, 'series') + query, lambda: self._series(index, *query)
+
+            if path == '/kpis':
+                return (version, 'kpis', exports.data_version(kpis.KPI_FILE)), lambda: self._kpis(df)
+        except ValueError as e:
+            raise QueryError(str(e))
+        return None, None
+
+    async def query(self, path, params):
+        """Cache -> in-flight future -> compute, in that order."""
+        loop = asyncio.get_running_loop()
+        data = await self.refresh()
+
+        key, compute = self.parse(path, params, data)
+        if key is None:
+            return 404, {'error': f"Unknown endpoint: {path}"}
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return 200, cached
+
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return 200, await asyncio.shield(pending)
+
+        future = loop.run_in_executor(self.executor, compute)
+        self.in_flight[key] = future
+        try:
+            result = await future
+        finally:
+            del self.in_flight[key]
+        self.cache.put(key, result)
+        return 200, result
+
+    def stats(self):
+        return {
+            'data_version': self.data[0],
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'coalesced': self.coalesced,
+            'in_flight': len(self.in_flight),
+        }
+
+
+# --- HTTP Layer (stdlib asyncio, HTTP/1.1 keep-alive, GET only) ---
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, default=str).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                raw = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+
+            lines = raw.decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ', 2)
+            except ValueError:
+                writer.write(_response(400, {'error': 'Malformed request line'}, False))
+                break
+            headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(':') for ln in lines[1:] if ln)}
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+            url = urlsplit(target)
+            params = dict(parse_qsl(url.query))
+            if method != 'GET':
+                status, payload = 400, {'error': 'Only GET is supported'}
+            elif url.path == '/health':
+                status, payload = 200, {'status': 'ok', **service.stats()}
+            else:
+                try:
+                    status, payload = await service.query(url.path, params)
+                except QueryError as e:
+                    status, payload = 400, {'error': str(e)}
+                except FileNotFoundError:
+                    status, payload = 503, {'error': 'Modeled data not found. Run the pipeline first.'}
+                except Exception as e:
+                    status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host=HOST, port=PORT, data_path=INPUT_FILE):
+    service = ForecastService(data_path)
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(service, r, w), host, port, limit=MAX_HEADER_BYTES, backlog=1024
+    )
+    print(f"✅ Forecast service listening on http://{host}:{port}")
+    print("   Endpoints: /health /forecast /simulate /series /kpis")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    print("--- Starting Forecast Query Service ---")
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    try:
+        asyncio.run(serve(port=port))
+    except KeyboardInterrupt:
+        print("\n🛑 Service stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Pure-Python policy simulator: no pandas/numpy, so the CLI, the query service
+# and the dashboard can all call it without paying for heavy imports.
+
+# --- Configuration (2030 assumptions) ---
+OVERLAP_FACTOR = 0.20      # Share of M-Pesa users who also hold Telebirr
+ADULT_POP_2030 = 68.0      # Millions of adults in 2030
+BASELINE_COMPLIANCE = 80   # Fuel-payment compliance (%) already priced into the active rate
+COMPLIANCE_BOOST = 0.1     # Conversion pts gained per compliance pt above baseline
+NATIONAL_TARGET = 70.0     # % account ownership targeted for 2030
+
+
+def simulate_inclusion(telebirr_users, mpesa_users, active_rate, fuel_compliance):
+    """
+    Policy simulator: projected 2030 inclusion for a set of levers.
+    Users in millions, rates in percent.
+    """
+    # 1. Total Addressable Market (unique wallets, net of multi-homing)
+    unique_users = telebirr_users + (mpesa_users * (1 - OVERLAP_FACTOR))
+
+    # 2. Implied coverage of the 2030 adult population
+    raw_coverage = (unique_users / ADULT_POP_2030) * 100
+
+    # 3. Active conversion; high fuel compliance turns forced usage into habit
+    compliance_boost = (fuel_compliance - BASELINE_COMPLIANCE) * COMPLIANCE_BOOST
+    final_conversion = (active_rate + compliance_boost) / 100
+
+    return {
+        'unique_users': unique_users,
+        'raw_coverage': raw_coverage,
+        'final_conversion': final_conversion,
+        'final_inclusion': min(raw_coverage * final_conversion, 100.0),
+    }
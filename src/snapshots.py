@@ -0,0 +1,255 @@
+import os
+import io
+import json
+import gzip
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import fileio
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+PROCESSED_DIR = os.path.join(BASE_DIR, 'data', 'processed')
+SNAPSHOT_DIR = os.path.join(BASE_DIR, 'data', 'snapshots')
+INDEX_FILE = os.path.join(SNAPSHOT_DIR, 'index.json')
+
+# Dataset name -> (file, row key)
+DATASETS = {
+    'enriched': (os.path.join(PROCESSED_DIR, 'ethiopia_fi_enriched.csv'), 'record_id'),
+    'modeled': (os.path.join(PROCESSED_DIR, 'ethiopia_fi_modeled.csv'), 'record_id'),
+    'forecast': (os.path.join(PROCESSED_DIR, 'ethiopia_fi_forecast_final.csv'), 'Year'),
+}
+
+# Chunk boundaries are picked by the row keys themselves (content-defined), so
+# inserting or editing a row only changes the chunk it falls in.
+AVG_CHUNK_ROWS = 64
+MAX_CHUNK_ROWS = 512
+# Stamped with the ingest date on every run, so they can't identify a keyless row
+AUDIT_COLS = ['collected_by', 'collection_date']
+
+
+# --- 1. Chunking ---
+
+def _row_keys(df, key_col):
+    """
+    Unique string key per row. Rows without a key are keyed by their content
+    (audit columns excluded), and repeated keys get an occurrence suffix so
+    every key is unique.
+    """
+    keys = pd.Series(None, index=df.index, dtype=object)
+    if key_col in df.columns:
+        present = df[key_col].notna() & (df[key_col].astype(str) != '')
+        keys[present] = df.loc[present, key_col].astype(str)
+    missing = keys.isna()
+    if missing.any():
+        content = pd.util.hash_pandas_object(df.loc[missing, df.columns.difference(AUDIT_COLS, sort=False)], index=False)
+        keys[missing] = [f"~{h:016x}" for h in content]
+
+    occurrence = keys.groupby(keys).cumcount()
+    return keys.where(occurrence == 0, keys + '#' + occurrence.astype(str))
+
+
+def chunk_frame(df, key_col):
+    """
+    Splits a dataset into key-ordered chunks.
+    Returns [(first key, last key, csv text)], all values kept as text so a
+    chunk round-trips byte for byte.
+    """
+    data = df.astype(str).where(df.notna(), '')
+    data.insert(0, '_key', _row_keys(df, key_col).to_numpy())
+    data = data.sort_values('_key', kind='mergesort')
+    keys = data['_key'].to_numpy()
+
+    # Boundary after any row whose key hash is 0 mod AVG_CHUNK_ROWS
+    hashes = pd.util.hash_pandas_object(pd.Series(keys), index=False).to_numpy()
+    cuts = list(np.flatnonzero(hashes % AVG_CHUNK_ROWS == 0) + 1)
+    chunks, start = [], 0
+    for stop in cuts + [len(data)]:
+        while stop - start > MAX_CHUNK_ROWS:
+            chunks.append((start, start + MAX_CHUNK_ROWS))
+            start += MAX_CHUNK_ROWS
+        if stop > start:
+            chunks.append((start, stop))
+            start = stop
+
+    return [(keys[lo], keys[hi - 1], data.iloc[lo:hi].to_csv(index=False)) for lo, hi in chunks]
+
+
+# --- 2. Chunk Store ---
+
+def _chunk_path(digest, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, 'chunks', digest[:2], f"{digest}.csv.gz")
+
+
+def _write_chunk(text, snapshot_dir=SNAPSHOT_DIR):
+    """Stores a chunk under its content hash. Returns (digest, written); existing chunks are reused."""
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    path = _chunk_path(digest, snapshot_dir)
+    if os.path.exists(path):
+        return digest, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with fileio.atomic_write(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+        f.write(text.encode('utf-8'))
+    return digest, True
+
+
+def _read_chunk(digest, snapshot_dir=SNAPSHOT_DIR):
+    with gzip.open(_chunk_path(digest, snapshot_dir), 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def _chunk_rows(digest, snapshot_dir=SNAPSHOT_DIR):
+    """A chunk as text values indexed by row key (empty string = missing)."""
+    text = _read_chunk(digest, snapshot_dir)
+    return pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False).set_index('_key')
+
+
+# --- 3. Vintages ---
+
+def list_vintages(snapshot_dir=SNAPSHOT_DIR):
+    """[{'id', 'created_at', 'rows'}], oldest first."""
+    path = os.path.join(snapshot_dir, 'index.json')
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_manifest(vintage_id, snapshot_dir=SNAPSHOT_DIR):
+    """Manifest of one vintage; 'latest' and 'previous' are accepted as ids."""
+    vintages = list_vintages(snapshot_dir)
+    aliases = {'latest': -1, 'previous': -2}
+    if vintage_id in aliases:
+        if len(vintages) < -aliases[vintage_id]:
+            raise KeyError(f"No {vintage_id} vintage")
+        vintage_id = vintages[aliases[vintage_id]]['id']
+    path = os.path.join(snapshot_dir, 'vintages', f"{vintage_id}.json")
+    if not os.path.exists(path):
+        raise KeyError(f"Unknown vintage: {vintage_id}")
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def take_snapshot(datasets=DATASETS, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Records the current datasets as a new vintage. Only chunks not already in
+    the store are written. If nothing changed since the latest vintage, no new
+    vintage is created. Returns (manifest, new chunk count, created).
+    """
+    entries, new_chunks = {}, 0
+    for name, (path, key_col) in datasets.items():
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        chunks = []
+        for first, last, text in chunk_frame(df, key_col):
+            digest, written = _write_chunk(text, snapshot_dir)
+            new_chunks += written
+            chunks.append([first, last, digest])
+        entries[name] = {'key': key_col, 'rows': len(df), 'columns': list(df.columns), 'chunks': chunks}
+
+    vintages = list_vintages(snapshot_dir)
+    if vintages:
+        latest = load_manifest(vintages[-1]['id'], snapshot_dir)
+        if latest['datasets'] == entries:
+            return latest, 0, False
+
+    now = datetime.now()
+    manifest = {
+        'id': now.strftime('%Y%m%d-%H%M%S'),
+        'created_at': now.isoformat(timespec='seconds'),
+        'datasets': entries,
+    }
+    if vintages and vintages[-1]['id'] >= manifest['id']:
+        manifest['id'] = f"{manifest['id']}-{len(vintages)}"  # Two snapshots within a second
+
+    os.makedirs(os.path.join(snapshot_dir, 'vintages'), exist_ok=True)
+    for path, payload in [
+        (os.path.join(snapshot_dir, 'vintages', f"{manifest['id']}.json"), manifest),
+        (os.path.join(snapshot_dir, 'index.json'), vintages + [{
+            'id': manifest['id'], 'created_at': manifest['created_at'],
+            'rows': {name: entry['rows'] for name, entry in entries.items()},
+        }]),
+    ]:
+        with fileio.atomic_write(path) as f:
+            json.dump(payload, f, indent=1)
+    return manifest, new_chunks, True
+
+
+def load_dataset(vintage_id, dataset, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Rebuilds one dataset as of a vintage, parsed like the original CSV.
+    Rows come back in key order.
+    """
+    entry = load_manifest(vintage_id, snapshot_dir)['datasets'][dataset]
+    texts = [_read_chunk(digest, snapshot_dir) for _, _, digest in entry['chunks']]
+    if not texts:
+        return pd.DataFrame(columns=entry['columns'])
+    # Every chunk repeats the header; keep the first one only
+    body = texts[0] + ''.join(t.split('\n', 1)[1] for t in texts[1:])
+    return pd.read_csv(io.StringIO(body)).drop(columns='_key')
+
+
+# --- 4. Diffs ---
+
+def diff(old_id, new_id, dataset, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Row-level changes of one dataset between two vintages.
+    Chunks present in both vintages are identical and skipped, so only the
+    chunks that differ are read: cost follows the size of the change.
+    Returns {'added', 'removed', 'modified', 'chunks_read'}; 'modified' is long
+    form (key, column, old, new).
+    """
+    old = load_manifest(old_id, snapshot_dir)['datasets'].get(dataset, {'chunks': [], 'key': None})
+    new = load_manifest(new_id, snapshot_dir)['datasets'].get(dataset, {'chunks': [], 'key': None})
+    old_digests = {digest for _, _, digest in old['chunks']}
+    new_digests = {digest for _, _, digest in new['chunks']}
+    changed_old = [d for _, _, d in old['chunks'] if d not in new_digests]
+    changed_new = [d for _, _, d in new['chunks'] if d not in old_digests]
+
+    def rows(digests):
+        frames = [_chunk_rows(d, snapshot_dir) for d in digests]
+        return pd.concat(frames) if frames else pd.DataFrame(index=pd.Index([], name='_key'))
+
+    before, after = rows(changed_old), rows(changed_new)
+    added = after.loc[after.index.difference(before.index, sort=False)]
+    removed = before.loc[before.index.difference(after.index, sort=False)]
+
+    common = before.index.intersection(after.index, sort=False)
+    columns = list(dict.fromkeys(list(before.columns) + list(after.columns)))
+    b = before.loc[common].reindex(columns=columns, fill_value='')
+    a = after.loc[common].reindex(columns=columns, fill_value='')
+    changed = (b != a).to_numpy()
+    row_idx, col_idx = np.nonzero(changed)
+    modified = pd.DataFrame({
+        'key': common[row_idx],
+        'column': np.asarray(columns, dtype=object)[col_idx],
+        'old': b.to_numpy()[row_idx, col_idx],
+        'new': a.to_numpy()[row_idx, col_idx],
+    })
+
+    return {
+        'added': added.rename_axis('key').reset_index(),
+        'removed': removed.rename_axis('key').reset_index(),
+        'modified': modified,
+        'chunks_read': len(changed_old) + len(changed_new),
+    }
+
+
+def main():
+    print("--- Recording Dataset Vintage ---")
+    manifest, new_chunks, created = take_snapshot()
+    total = sum(len(entry['chunks']) for entry in manifest['datasets'].values())
+    if created:
+        print(f"✅ Success! Vintage {manifest['id']}: {new_chunks} new of {total} chunks stored.")
+    else:
+        print(f"✅ Unchanged since vintage {manifest['id']}; nothing stored.")
+    print(f"   Store: {SNAPSHOT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
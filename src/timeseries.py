@@ -0,0 +1,251 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+import fileio
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'ethiopia_fi_modeled.csv')
+STORE_DIR = os.path.join(BASE_DIR, 'data', 'processed', 'series_store')
+
+# One plotted point per horizontal pixel is the most a chart can show.
+DEFAULT_CHART_WIDTH = 1200
+
+# Rows with these gender/location values belong to the national series
+SEGMENT_COLS = ['gender', 'location']
+NATIONAL_SEGMENTS = {'', 'all', 'total', 'national'}
+
+
+def segment_key(code, segment=''):
+    """Series key: 'ACC_OWNERSHIP' for national rows, 'ACC_OWNERSHIP|gender=female' for breakdowns."""
+    return f"{code}|{segment}" if segment else code
+
+
+def segment_labels(df):
+    """Per-row segment label, e.g. 'gender=female,location=urban' ('' = national)."""
+    labels = pd.Series('', index=df.index, dtype=object)
+    for col in SEGMENT_COLS:
+        if col not in df.columns:
+            continue
+        values = df[col].fillna('').astype(str).str.strip().str.lower()
+        part = np.where(values.isin(NATIONAL_SEGMENTS), '', col + '=' + values)
+        labels = np.where((labels != '') & (part != ''), labels + ',' + part, labels + part)
+        labels = pd.Series(labels, index=df.index, dtype=object)
+    return labels
+
+
+class SeriesIndex:
+    """
+    Indicator-major view over the observation rows of the long-format dataset.
+    Rows are sorted once by (indicator, segment, observation_date) and stored as
+    two flat arrays with an offsets table, so a (series, date range) lookup is two
+    binary searches and a zero-copy slice instead of a full-frame mask.
+    The arrays can be saved once and memory-mapped by any number of processes
+    (see save() / open()), which then share the same pages.
+    """
+
+    def __init__(self, df, key_col='indicator_code', date_col='observation_date', value_col='value_numeric'):
+        # Targets and events can carry a code, date and value too; they are not history
+        if 'record_type' in df.columns:
+            df = df[df['record_type'] == 'observation']
+        data = df[[key_col, date_col, value_col]].copy()
+        data['_key'] = [segment_key(c, s) for c, s in zip(data[key_col], segment_labels(df))]
+        data[date_col] = pd.to_datetime(data[date_col], errors='coerce')
+        data[value_col] = pd.to_numeric(data[value_col], errors='coerce')
+        data = data.dropna().sort_values(['_key', date_col], kind='mergesort')
+
+        self.dates = data[date_col].to_numpy(dtype='datetime64[ns]')
+        self.values = data[value_col].to_numpy(dtype='float64')
+
+        keys = data['_key'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=int)
+        stops = np.r_[starts[1:], len(keys)]
+        self.offsets = {str(keys[s]): (int(s), int(e)) for s, e in zip(starts, stops)}
+
+        # Unit per indicator decides which chart axis it belongs on
+        self.units = {}
+        if 'unit' in df.columns:
+            units = df.dropna(subset=[key_col, 'unit']).drop_duplicates(key_col)
+            self.units = {str(k): str(u) for k, u in zip(units[key_col], units['unit'])}
+
+    @property
+    def codes(self):
+        """Indicator codes (national and segmented series alike)."""
+        return sorted({key.split('|', 1)[0] for key in self.offsets})
+
+    def segments(self, code):
+        """Segment labels available for an indicator ('' = national)."""
+        return sorted(key.split('|', 1)[1] if '|' in key else '' for key in self.offsets
+                      if key.split('|', 1)[0] == code)
+
+    def window(self, code, start=None, end=None, segment=''):
+        """Returns (dates, values) views for one series within [start, end]."""
+        key = segment_key(code, segment)
+        if key not in self.offsets:
+            return self.dates[:0], self.values[:0]
+
+        lo, hi = self.offsets[key]
+        dates = self.dates[lo:hi]
+        left = 0 if start is None else np.searchsorted(dates, np.datetime64(start, 'ns'), side='left')
+        right = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, 'ns'), side='right')
+        return dates[left:right], self.values[lo + left:lo + right]
+
+    # --- Memory-mapped store ---
+    def save(self, out_dir=STORE_DIR):
+        """
+        Writes the arrays as .npy files plus index.json.
+        Array files are content-named and index.json is swapped in last, so a
+        reader never sees a half-written store. The previous generation is kept
+        for readers still loading (or mapping) it; older ones are removed, and a
+        file that is still mapped (Windows) is left for the next save.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        digest = hashlib.sha1(self.dates.tobytes() + self.values.tobytes()).hexdigest()[:12]
+        files = {'dates': f"dates-{digest}.npy", 'values': f"values-{digest}.npy"}
+        for name, array in [(files['dates'], self.dates), (files['values'], self.values)]:
+            path = os.path.join(out_dir, name)
+            if os.path.exists(path):
+                continue  # Same content, possibly mapped by readers: never rewrite it in place
+            with fileio.atomic_write(path, 'wb') as f:
+                np.save(f, array)
+
+        index_path = os.path.join(out_dir, 'index.json')
+        keep = set(files.values())
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                keep |= set(json.load(f)['files'].values())
+
+        index = {'version': digest, 'files': files, 'offsets': self.offsets, 'units': self.units}
+        with fileio.atomic_write(index_path) as f:
+            json.dump(index, f)
+
+        for name in os.listdir(out_dir):
+            if name.endswith('.npy') and name not in keep:
+                try:
+                    os.remove(os.path.join(out_dir, name))
+                except OSError:
+                    pass
+        return digest
+
+    @classmethod
+    def open(cls, store_dir=STORE_DIR):
+        """Memory-maps a saved store (read-only). Returns None if it doesn't exist."""
+        index_path = os.path.join(store_dir, 'index.json')
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+
+        store = cls.__new__(cls)
+        store.version = index['version']
+        store.dates = np.load(os.path.join(store_dir, index['files']['dates']), mmap_mode='r')
+        store.values = np.load(os.path.join(store_dir, index['files']['values']), mmap_mode='r')
+        store.offsets = {k: tuple(v) for k, v in index['offsets'].items()}
+        store.units = index['units']
+        return store
+
+
+def load_index(df, source=INPUT_FILE, store_dir=STORE_DIR):
+    """
+    Memory-maps the saved store when it is at least as new as `source`,
+    otherwise builds the index from `df` in memory.
+    """
+    index_path = os.path.join(store_dir, 'index.json')
+    if os.path.exists(index_path) and os.path.exists(source) \
+            and os.stat(index_path).st_mtime_ns >= os.stat(source).st_mtime_ns:
+        return SeriesIndex.open(store_dir)
+    return SeriesIndex(df)
+
+
+def _bucket_edges(n, n_buckets, skip_ends=False):
+    """Equal-count bucket boundaries over n points."""
+    if skip_ends:
+        return np.linspace(1, n - 1, n_buckets + 1).astype(int)
+    return np.linspace(0, n, n_buckets + 1).astype(int)
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Keeps the first and last points and, per bucket, the point forming the largest
+    triangle with the previously kept point and the next bucket's mean.
+    Returns the indices of the kept points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = _bucket_edges(n, n_out - 2, skip_ends=True)
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(np.argmax(area))
+        kept[i + 1] = prev
+    return kept
+
+
+def minmax(y, n_out):
+    """
+    Min/max-per-bucket downsampling: keeps the extremes of n_out / 2 buckets,
+    so spikes survive. Returns the sorted indices of the kept points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype='float64')
+    edges = _bucket_edges(n, n_out // 2)
+    kept = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            kept.extend((lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))))
+    return np.unique(kept)
+
+
+def downsample(dates, values, max_points=DEFAULT_CHART_WIDTH, method='lttb'):
+    """Reduces a series to at most `max_points` points; short series pass through."""
+    if len(values) <= max_points:
+        return dates, values
+
+    if method == 'minmax':
+        idx = minmax(values, max_points)
+    else:
+        idx = lttb(dates.astype('int64'), values, max_points)
+    return dates[idx], values[idx]
+
+
+def main():
+    print("--- Building Memory-Mapped Series Store ---")
+
+    if not os.path.exists(INPUT_FILE):
+        print("❌ CRITICAL: Modeled data not found. Run impact.py first.")
+        return
+    df = pd.read_csv(INPUT_FILE)
+
+    index = SeriesIndex(df)
+    version = index.save(STORE_DIR)
+    print(f"✅ Success! Stored {len(index.offsets)} series ({len(index.values)} points), version {version}.")
+    print(f"   Saved to: {STORE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pipeline
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPT_DIR)
+WATCH_DIR = os.path.join(BASE_DIR, 'data', 'raw')
+
+POLL_SECONDS = 1.0        # How often data/raw is stat-ed
+DEBOUNCE_SECONDS = 5.0    # Quiet period after the last change before running
+# Editor swap files, partial downloads and Office lock files are not data
+IGNORED_PREFIXES = ('.', '~$')
+IGNORED_SUFFIXES = ('.tmp', '.part', '.crdownload', '.swp', '~')
+
+
+def snapshot(directory=WATCH_DIR):
+    """{file name: (size, mtime_ns)} for the files in `directory`."""
+    if not os.path.isdir(directory):
+        return {}
+    files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.startswith(IGNORED_PREFIXES) or entry.name.endswith(IGNORED_SUFFIXES):
+                continue
+            stat = entry.stat()
+            files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def changed_files(before, after):
+    """Names added, removed or modified between two snapshots."""
+    return {name for name in before.keys() | after.keys() if before.get(name) != after.get(name)}
+
+
+class Watcher:
+    """
+    Polls data/raw and re-runs the pipeline once a burst of changes has settled.
+    The event loop only polls and debounces; pipeline.run() blocks, so it runs on
+    a single runner thread (one run at a time) and fans CPU-bound stages out to
+    its own process pool. Unchanged stages are skipped by their content hash, and
+    every stage swaps its outputs in with os.replace, so readers such as the
+    dashboard see either the previous or the new artifacts, never a partial file.
+    """
+
+    def __init__(self, directory=WATCH_DIR, poll=POLL_SECONDS, debounce=DEBOUNCE_SECONDS,
+                 targets=None, max_workers=None):
+        self.directory = directory
+        self.poll = poll
+        self.debounce = debounce
+        self.targets = targets
+        self.max_workers = max_workers
+        self.runner = ThreadPoolExecutor(max_workers=1)
+        self.runs = 0
+
+    async def run_pipeline(self, reason):
+        print(f"\n🔄 {reason}")
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        results = await loop.run_in_executor(
+            self.runner, lambda: pipeline.run(targets=self.targets, max_workers=self.max_workers)
+        )
+        self.runs += 1
+
+        ran = [n for n, r in results.items() if r == 'ran']
+        failed = [n for n, r in results.items() if r in ('failed', 'blocked')]
+        icon = '❌' if failed else '✅'
+        print(f"{icon} Run {self.runs} finished in {time.perf_counter() - started:.1f}s: "
+              f"ran {', '.join(ran) or 'nothing'}" + (f"; failed {', '.join(failed)}" if failed else ""))
+        return results
+
+    async def watch(self, max_runs=None):
+        """Runs once to catch up, then on every settled change. Stops after `max_runs` if given."""
+        loop = asyncio.get_running_loop()
+        previous = snapshot(self.directory)
+        await self.run_pipeline("Initial run")
+
+        pending, last_change = set(), None
+        while max_runs is None or self.runs < max_runs:
+            await asyncio.sleep(self.poll)
+            current = snapshot(self.directory)
+            changed = changed_files(previous, current)
+            previous = current
+
+            if changed:
+                # Still being written/copied: restart the quiet period
+                pending |= changed
+                last_change = loop.time()
+                continue
+            if pending and loop.time() - last_change >= self.debounce:
+                names = sorted(pending)
+                pending.clear()
+                await self.run_pipeline(f"{len(names)} file(s) changed: {', '.join(names[:5])}"
+                                        + (" ..." if len(names) > 5 else ""))
+
+    def close(self):
+        self.runner.shutdown()
+
+
+def main():
+    print("--- Watching data/raw ---")
+    args = sys.argv[1:]
+    targets = [a for a in args if not a.startswith('--')] or None
+    unknown = set(targets or []) - {s.name for s in pipeline.STAGES}
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(sorted(unknown))}. Available: {', '.join(s.name for s in pipeline.STAGES)}")
+        sys.exit(1)
+    print(f"   Directory: {WATCH_DIR}")
+    print(f"   Debounce:  {DEBOUNCE_SECONDS:.0f}s after the last change (Ctrl+C to stop)")
+
+    watcher = Watcher(targets=targets)
+    try:
+        asyncio.run(watcher.watch())
+    except KeyboardInterrupt:
+        print("\n🛑 Watch stopped.")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import coverage
+
+
+def _rows(n, seed, codes=('ACC_OWNERSHIP', 'USG_TELEBIRR_USERS', 'USG_P2P_COUNT')):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'record_type': rng.choice(['observation', 'observation', 'observation', 'event'], n),
+        'indicator_code': rng.choice(codes, n),
+        'observation_date': pd.to_datetime('2014-01-01') + pd.to_timedelta(rng.integers(0, 4000, n), unit='D'),
+        'gender': rng.choice(['', 'all', 'female', 'male'], n),
+        'location': rng.choice(['', 'national', 'urban'], n),
+        'source_type': rng.choice(['survey', 'operator', None], n),
+        'confidence': rng.choice(['High', 'medium', 'low', None], n),
+        'value_numeric': rng.normal(size=n),
+    })
+
+
+def test_profile_counts_observations_per_cell():
+    df = _rows(400, seed=1)
+    cells = coverage.profile(df)
+    obs = df[df['record_type'] == 'observation']
+    assert cells['count'].sum() == len(obs)
+    # Every row lands in exactly one source and one confidence bucket
+    assert (cells.filter(like='src_').sum(axis=1) == cells['count']).all()
+    assert (cells.filter(like='conf_').sum(axis=1) == cells['count']).all()
+
+    national = cells[(cells['indicator_code'] == 'ACC_OWNERSHIP') & (cells['segment'] == '')]
+    expected = obs[(obs['indicator_code'] == 'ACC_OWNERSHIP') & obs['gender'].isin(['', 'all'])
+                   & obs['location'].isin(['', 'national'])]
+    assert national['count'].sum() == len(expected)
+
+
+def test_confidence_score_without_known_levels():
+    cells = coverage.profile(pd.DataFrame({
+        'record_type': ['observation'], 'indicator_code': ['X'],
+        'observation_date': ['2024-01-01'], 'confidence': [None],
+    }))
+    assert cells['count'].tolist() == [1]
+    assert np.isnan(cells['confidence_score'].iloc[0])
+
+
+def test_confidence_score_is_mean_level():
+    cells = coverage.profile(pd.DataFrame({
+        'record_type': 'observation', 'indicator_code': 'X',
+        'observation_date': ['2024-01-01'] * 3, 'confidence': ['high', 'low', None],
+    }))
+    assert cells['confidence_score'].iloc[0] == 2.0
+
+
+@pytest.mark.parametrize('n_new', [1, 25, 200])
+def test_incremental_refresh_matches_full_profile(n_new):
+    base, extra = _rows(300, seed=2), _rows(n_new, seed=3 + n_new, codes=('ACC_OWNERSHIP', 'NEW_CODE'))
+    table, seen, _ = coverage.refresh_coverage(base)
+
+    grown = pd.concat([base, extra], ignore_index=True)
+    updated, _, profiled = coverage.refresh_coverage(grown, table, seen)
+    assert profiled == n_new
+    pdt.assert_frame_equal(updated, coverage.profile(grown))
+
+
+def test_edited_row_forces_full_profile():
+    base = _rows(100, seed=4)
+    table, seen, _ = coverage.refresh_coverage(base)
+    edited = base.copy()
+    edited.loc[edited['record_type'] == 'observation', 'confidence'] = 'high'
+
+    updated, _, profiled = coverage.refresh_coverage(edited, table, seen)
+    assert profiled == len(edited)
+    pdt.assert_frame_equal(updated, coverage.profile(edited))
+
+
+def test_save_load_round_trip_writes_fingerprints_last(tmp_path):
+    table, seen, _ = coverage.refresh_coverage(_rows(150, seed=5))
+    path, rows_path = tmp_path / 'coverage.csv.gz', tmp_path / 'coverage_rows.json'
+    coverage.save_coverage(table, path=path, seen=seen, rows_path=rows_path)
+
+    pdt.assert_frame_equal(coverage.load_coverage(path), table)
+    assert path.stat().st_mtime_ns <= rows_path.stat().st_mtime_ns
+
+
+def test_sufficiency_reports_gaps():
+    df = pd.DataFrame({
+        'record_type': 'observation', 'indicator_code': 'ACC_OWNERSHIP',
+        'observation_date': ['2014-12-31', '2017-12-31', '2021-12-31'], 'value_numeric': [22.0, 35.0, 46.0],
+    })
+    check = coverage.sufficiency(coverage.profile(df), 'ACC_OWNERSHIP')
+    assert check['years'] == [2014, 2017, 2021]
+    assert check['missing_years'] == [2015, 2016, 2018, 2019, 2020]
+    assert check['sufficient']
+    assert not coverage.sufficiency(coverage.profile(df), 'ACC_OWNERSHIP', since=2018)['sufficient']
@@ -0,0 +1,96 @@
+import json
+
+import pandas as pd
+import pytest
+
+import kpis
+
+
+def _obs(code, date, value, gender=''):
+    return {'record_type': 'observation', 'indicator_code': code, 'observation_date': date,
+            'value_numeric': value, 'gender': gender, 'location': ''}
+
+
+@pytest.fixture
+def modeled():
+    return pd.DataFrame([
+        _obs('ACC_OWNERSHIP', '2017-12-31', 35.0),
+        _obs('ACC_OWNERSHIP', '2021-12-31', 46.0),
+        _obs('ACC_OWNERSHIP', '2021-12-31', 56.0, gender='male'),
+        _obs('USG_TELEBIRR_USERS', '2022-06-01', 27.0),
+        _obs('USG_TELEBIRR_USERS', '2024-01-01', 54.0),
+        _obs('USG_MPESA_USERS', '2024-06-01', 10.0),
+        _obs('USG_P2P_COUNT', '2024-06-30', 120.0),
+        _obs('USG_ATM_COUNT', '2024-06-30', 100.0),
+        {'record_type': 'target', 'indicator_code': 'ACC_OWNERSHIP', 'observation_date': '2030-12-31',
+         'value_numeric': 70.0, 'gender': '', 'location': ''},
+    ])
+
+
+@pytest.fixture
+def forecast():
+    return pd.DataFrame({'Year': [2025, 2030], 'Pessimistic': [47.0, 50.0],
+                         'Base_Case': [49.0, 53.0], 'Optimistic': [52.0, 68.0]})
+
+
+def test_full_build(modeled, forecast):
+    kpi = kpis.compute_kpis(modeled, forecast)['kpis']
+    assert kpi['access_latest'] == 46.0  # National row, not the male breakdown or the 2030 target
+    assert (kpi['access_delta'], kpi['access_prev_year']) == (11.0, 2017)
+    assert kpi['wallet_total'] == 64.0
+    assert kpi['p2p_atm_ratio'] == 1.2
+    assert (kpi['forecast_year'], kpi['forecast_base_case']) == (2030, 53.0)
+
+
+@pytest.mark.parametrize('appended', [
+    [_obs('ACC_OWNERSHIP', '2024-12-31', 49.0)],                                       # New latest point
+    [_obs('ACC_OWNERSHIP', '2014-12-31', 22.0)],                                       # New first point
+    [_obs('USG_TELEBIRR_USERS', '2023-01-01', 40.0), _obs('USG_MPESA_USERS', '2025-01-01', 12.0)],
+    [_obs('ACC_OWNERSHIP', '2024-12-31', 51.0, gender='female')],                      # Breakdown only
+])
+def test_incremental_matches_full_rebuild(modeled, forecast, appended):
+    artifact, seen, _ = kpis.refresh_kpis(modeled, None, None, forecast)
+    grown = pd.concat([modeled, pd.DataFrame(appended)], ignore_index=True)
+
+    updated, _, folded = kpis.refresh_kpis(grown, artifact, seen, forecast)
+    full = kpis.compute_kpis(grown, forecast)
+    assert folded == len(appended)
+    assert updated['kpis'] == full['kpis']
+    assert updated['series'] == full['series']
+
+
+def test_revised_row_forces_full_rebuild(modeled, forecast):
+    artifact, seen, _ = kpis.refresh_kpis(modeled, None, None, forecast)
+    revised = modeled.copy()
+    revised.loc[1, 'value_numeric'] = 47.0
+
+    updated, _, folded = kpis.refresh_kpis(revised, artifact, seen, forecast)
+    assert folded == len(revised)
+    assert updated['kpis']['access_latest'] == 47.0
+
+
+def test_unchanged_data_folds_nothing(modeled, forecast):
+    artifact, seen, _ = kpis.refresh_kpis(modeled, None, None, forecast)
+    updated, _, folded = kpis.refresh_kpis(modeled, artifact, seen, forecast)
+    assert folded == 0
+    assert updated['kpis'] == artifact['kpis']
+
+
+def test_forecast_kpis_carried_over_without_forecast(modeled, forecast):
+    artifact, seen, _ = kpis.refresh_kpis(modeled, None, None, forecast)
+    grown = pd.concat([modeled, pd.DataFrame([_obs('ACC_OWNERSHIP', '2024-12-31', 49.0)])], ignore_index=True)
+
+    updated, _, _ = kpis.refresh_kpis(grown, artifact, seen, None)
+    assert updated['kpis']['forecast_base_case'] == 53.0
+    assert updated['kpis']['access_latest'] == 49.0
+
+
+def test_artifact_stays_small_and_fingerprints_go_last(modeled, forecast, tmp_path):
+    artifact, seen, _ = kpis.refresh_kpis(modeled, None, None, forecast)
+    path, rows_path = tmp_path / 'kpis.json', tmp_path / 'kpis_rows.json'
+    kpis.save_kpis(artifact, path=path, seen=seen, rows_path=rows_path)
+
+    with open(path, encoding='utf-8') as f:
+        assert set(json.load(f)) == {'generated_at', 'kpis', 'series'}
+    assert kpis.load_kpis(path) == artifact['kpis']
+    assert path.stat().st_mtime_ns <= rows_path.stat().st_mtime_ns
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import leadlag
+import timeseries
+
+
+def brute_force(values, mask, i, j, lag, min_overlap):
+    """Pearson r of series i at t against series j at t + lag, over months where both are observed."""
+    n = values.shape[1]
+    t = np.arange(max(0, -lag), min(n, n - lag))
+    both = (mask[i, t] > 0) & (mask[j, t + lag] > 0)
+    if both.sum() < min_overlap:
+        return np.nan, int(both.sum())
+    x, y = values[i, t[both]], values[j, t[both] + lag]
+    if x.std() == 0 or y.std() == 0:
+        return np.nan, int(both.sum())
+    return np.corrcoef(x, y)[0, 1], int(both.sum())
+
+
+@pytest.fixture
+def sparse_series():
+    rng = np.random.default_rng(7)
+    n_series, n_months = 6, 90
+    values = rng.normal(size=(n_series, n_months))
+    mask = (rng.random((n_series, n_months)) < 0.6).astype('float64')
+    return values * mask, mask
+
+
+def test_masked_correlations_match_brute_force(sparse_series):
+    values, mask = sparse_series
+    blocks = list(leadlag.lagged_correlations(values, mask, max_lag=12, min_overlap=4))
+
+    checked = 0
+    for lags, pair_i, pair_j, corr, overlap in blocks:
+        for row, (i, j) in enumerate(zip(pair_i, pair_j)):
+            for col, lag in enumerate(lags):
+                expected, expected_n = brute_force(values, mask, i, j, lag, 4)
+                assert overlap[row, col] == expected_n
+                if np.isnan(expected):
+                    assert np.isnan(corr[row, col])
+                else:
+                    assert corr[row, col] == pytest.approx(expected, abs=1e-9)
+                checked += 1
+    assert checked == 15 * 25  # Every pair i < j at every lag
+
+
+def test_blocks_cover_every_pair_once(sparse_series, monkeypatch):
+    values, mask = sparse_series
+    monkeypatch.setattr(leadlag, 'BLOCK_ELEMENTS', 1)  # One row of pairs per block
+    pairs = [(i, j) for _, pi, pj, _, _ in leadlag.lagged_correlations(values, mask, max_lag=3)
+             for i, j in zip(pi, pj)]
+    assert sorted(pairs) == [(i, j) for i in range(6) for j in range(i + 1, 6)]
+
+
+def test_best_lags_recovers_a_planted_lead():
+    rng = np.random.default_rng(3)
+    base = rng.normal(size=140)
+    leader = base[20:]
+    follower = base[13:133]  # follower[t + 7] == leader[t]
+    values = np.vstack([leader, follower, rng.normal(size=120)])
+    mask = np.ones_like(values)
+
+    pair_i, pair_j, lag, corr, _ = leadlag.best_lags(values, mask, max_lag=12)
+    best = dict(zip(zip(pair_i, pair_j), zip(lag, corr)))
+    assert best[(0, 1)][0] == 7
+    assert best[(0, 1)][1] == pytest.approx(1.0)
+
+
+def test_fast_len_is_5_smooth_and_large_enough():
+    for n in [1, 7, 97, 128, 1000, 4099]:
+        size = leadlag._fast_len(n)
+        assert size >= n
+        rest = size
+        for p in (2, 3, 5):
+            while rest % p == 0:
+                rest //= p
+        assert rest == 1
+
+
+def test_lead_lag_table_orients_pairs_by_leader():
+    months = pd.date_range('2015-01-31', periods=60, freq='ME')
+    signal = np.sin(np.arange(66) / 3.0) + np.arange(66) * 0.01
+    df = pd.DataFrame({
+        'record_type': 'observation',
+        'indicator_code': ['LEAD'] * 60 + ['FOLLOW'] * 60,
+        'observation_date': list(months) * 2,
+        'value_numeric': np.r_[signal[6:], signal[:60]],  # FOLLOW trails LEAD by 6 months
+    })
+
+    table = leadlag.lead_lag_table(df, max_lag=12)
+    top = table.iloc[0]
+    assert (top['leader'], top['follower'], top['lag_months']) == ('LEAD', 'FOLLOW', 6)
+    assert list(table['rank']) == list(range(1, len(table) + 1))
+
+
+def test_monthly_grid_skips_segments_and_constant_series():
+    df = pd.DataFrame({
+        'record_type': 'observation',
+        'indicator_code': ['A'] * 5 + ['B'] * 5 + ['A'] * 5,
+        'gender': [''] * 10 + ['female'] * 5,
+        'observation_date': list(pd.date_range('2020-01-31', periods=5, freq='ME')) * 3,
+        'value_numeric': [1, 2, 3, 4, 5] + [2] * 5 + [9, 8, 7, 6, 5],
+    })
+    codes, values, mask = leadlag.monthly_grid(timeseries.SeriesIndex(df))
+    assert codes == ['A']
+    assert values.shape == mask.shape == (1, 5)
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+import snapshots
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    df = pd.DataFrame({
+        'record_id': [f"REC_{i:04d}" for i in range(600)],
+        'indicator_code': ['ACC_OWNERSHIP', 'USG_TELEBIRR_USERS', 'USG_P2P_COUNT'] * 200,
+        'observation_date': pd.date_range('2010-01-31', periods=600, freq='ME').strftime('%Y-%m-%d'),
+        'value_numeric': [round(i * 0.1, 1) for i in range(600)],
+        'collected_by': 'Pipeline_Ingest_Official_Unified',
+        'collection_date': '2026-01-30',
+    })
+    path = tmp_path / 'modeled.csv'
+    df.to_csv(path, index=False)
+    return df, path, {'modeled': (str(path), 'record_id')}, str(tmp_path / 'snapshots')
+
+
+def test_round_trip_and_unchanged_snapshot(dataset):
+    _, path, datasets, store = dataset
+    manifest, new_chunks, created = snapshots.take_snapshot(datasets, store)
+    assert created and new_chunks == len(manifest['datasets']['modeled']['chunks']) > 1
+
+    restored = snapshots.load_dataset(manifest['id'], 'modeled', store)
+    pd.testing.assert_frame_equal(restored, pd.read_csv(path))
+
+    again, new_chunks, created = snapshots.take_snapshot(datasets, store)
+    assert not created and new_chunks == 0 and again['id'] == manifest['id']
+
+
+def test_diff_reads_only_changed_chunks(dataset):
+    df, path, datasets, store = dataset
+    old, _, _ = snapshots.take_snapshot(datasets, store)
+
+    edited = df.copy()
+    edited.loc[10, 'value_numeric'] = 99.9                     # Modified
+    edited = edited.drop(index=500)                            # Removed
+    edited = pd.concat([edited, pd.DataFrame([{**df.iloc[0].to_dict(), 'record_id': 'REC_9999'}])])  # Added
+    edited.to_csv(path, index=False)
+    new, new_chunks, created = snapshots.take_snapshot(datasets, store)
+    assert created
+
+    changes = snapshots.diff(old['id'], new['id'], 'modeled', store)
+    assert changes['added']['key'].tolist() == ['REC_9999']
+    assert changes['removed']['key'].tolist() == ['REC_0500']
+    modified = changes['modified']
+    assert modified[['key', 'column', 'old', 'new']].values.tolist() == [['REC_0010', 'value_numeric', '1.0', '99.9']]
+
+    # Content-defined chunking: a few local edits touch a few chunks, not the whole dataset
+    total = len(old['datasets']['modeled']['chunks']) + len(new['datasets']['modeled']['chunks'])
+    assert changes['chunks_read'] <= 6 < total
+    assert new_chunks <= 3
+
+    assert snapshots.diff('previous', 'latest', 'modeled', store)['added']['key'].tolist() == ['REC_9999']
+
+
+def test_keyless_rows_keep_their_key_across_audit_stamps(dataset):
+    df, _, _, _ = dataset
+    keyless = df.head(5).assign(record_id=None)
+    restamped = keyless.assign(collection_date='2026-10-19', collected_by='Pipeline_Ingest_Manual_Inject')
+    assert snapshots._row_keys(keyless, 'record_id').tolist() == snapshots._row_keys(restamped, 'record_id').tolist()
+
+    changed = keyless.assign(value_numeric=keyless['value_numeric'] + 1)
+    assert not set(snapshots._row_keys(keyless, 'record_id')) & set(snapshots._row_keys(changed, 'record_id'))
+
+
+def test_repeated_keys_are_made_unique():
+    df = pd.DataFrame({'record_id': ['A', 'A', None, None], 'value_numeric': [1, 2, 3, 3]})
+    keys = snapshots._row_keys(df, 'record_id')
+    assert keys.is_unique
+    assert keys.iloc[0] == 'A' and keys.iloc[1] == 'A#1'
+
+
+def test_unknown_vintage(dataset):
+    _, _, datasets, store = dataset
+    with pytest.raises(KeyError):
+        snapshots.load_manifest('previous', store)
+    snapshots.take_snapshot(datasets, store)
+    with pytest.raises(KeyError):
+        snapshots.load_manifest('19990101-000000', store)
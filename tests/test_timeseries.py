@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import timeseries
+
+
+@pytest.fixture
+def noisy():
+    rng = np.random.default_rng(11)
+    dates = np.datetime64('2020-01-01', 'ns') + np.arange(5000) * np.timedelta64(1, 'h')
+    values = np.cumsum(rng.normal(size=5000))
+    values[1234] += 500  # A spike the chart must not lose
+    return dates, values
+
+
+@pytest.mark.parametrize('n_out', [3, 10, 250, 1200])
+def test_lttb_bounds(noisy, n_out):
+    dates, values = noisy
+    kept = timeseries.lttb(dates.astype('int64'), values, n_out)
+    assert len(kept) == n_out
+    assert kept[0] == 0 and kept[-1] == len(values) - 1
+    assert np.all(np.diff(kept) > 0)  # Strictly increasing: no duplicates, order preserved
+
+
+def test_lttb_passes_short_series_through():
+    assert list(timeseries.lttb(np.arange(5), np.arange(5.0), 10)) == [0, 1, 2, 3, 4]
+    assert list(timeseries.lttb(np.arange(5), np.arange(5.0), 2)) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('n_out', [2, 9, 100, 1200])
+def test_minmax_bounds_and_extremes(noisy, n_out):
+    _, values = noisy
+    kept = timeseries.minmax(values, n_out)
+    assert len(kept) <= n_out
+    assert np.all(np.diff(kept) > 0)
+    assert values.argmax() in kept and values.argmin() in kept
+
+
+def test_downsample_caps_points_and_keeps_pairs(noisy):
+    dates, values = noisy
+    for method in ('lttb', 'minmax'):
+        d, v = timeseries.downsample(dates, values, max_points=300, method=method)
+        assert len(d) == len(v) <= 300
+        # Every kept (date, value) pair comes from the original series
+        pos = np.searchsorted(dates, d)
+        assert np.array_equal(dates[pos], d) and np.array_equal(values[pos], v)
+
+    d, v = timeseries.downsample(dates[:50], values[:50], max_points=300)
+    assert len(d) == 50
+
+
+def test_window_is_inclusive_and_segment_aware():
+    df = pd.DataFrame({
+        'record_type': ['observation'] * 5 + ['target'],
+        'indicator_code': ['A'] * 6,
+        'gender': ['', '', '', 'female', 'all', ''],
+        'observation_date': ['2020-01-01', '2021-01-01', '2022-01-01', '2021-01-01', '2023-01-01', '2030-01-01'],
+        'value_numeric': [1.0, 2.0, 3.0, 20.0, 4.0, 70.0],
+    })
+    index = timeseries.SeriesIndex(df)
+
+    dates, values = index.window('A', '2021-01-01', '2023-01-01')
+    assert list(values) == [2.0, 3.0, 4.0]
+    assert list(index.window('A')[1]) == [1.0, 2.0, 3.0, 4.0]  # The target row is not history
+    assert list(index.window('A', segment='gender=female')[1]) == [20.0]
+    assert len(index.window('MISSING')[0]) == 0
+
+
+def _frame(values):
+    return pd.DataFrame({
+        'record_type': 'observation',
+        'indicator_code': 'A',
+        'observation_date': pd.date_range('2020-01-01', periods=len(values), freq='MS'),
+        'value_numeric': values,
+    })
+
+
+def test_store_round_trip_and_generations(tmp_path):
+    first = timeseries.SeriesIndex(_frame([1.0, 2.0, 3.0]))
+    v1 = first.save(tmp_path)
+    mapped = timeseries.SeriesIndex.open(tmp_path)
+    assert mapped.version == v1
+    assert list(mapped.window('A', '2020-02-01')[1]) == [2.0, 3.0]
+
+    # Saving unchanged data leaves the mapped arrays alone (same inode, not rewritten)
+    inode = (tmp_path / f"values-{v1}.npy").stat().st_ino
+    assert timeseries.SeriesIndex(_frame([1.0, 2.0, 3.0])).save(tmp_path) == v1
+    assert (tmp_path / f"values-{v1}.npy").stat().st_ino == inode
+
+    # The previous generation survives one save, then goes
+    v2 = timeseries.SeriesIndex(_frame([1.0, 2.0, 4.0])).save(tmp_path)
+    assert (tmp_path / f"values-{v1}.npy").exists()
+    assert list(mapped.values) == [1.0, 2.0, 3.0]
+    v3 = timeseries.SeriesIndex(_frame([1.0, 2.0, 5.0])).save(tmp_path)
+    names = {p.name for p in tmp_path.iterdir()}
+    assert names == {'index.json', f"dates-{v2}.npy", f"values-{v2}.npy", f"dates-{v3}.npy", f"values-{v3}.npy"}
+    assert list(timeseries.SeriesIndex.open(tmp_path).window('A')[1]) == [1.0, 2.0, 5.0]